@@ -8,3 +8,12 @@ from django.apps import AppConfig
 class DynApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.dyn_api'
+
+    def ready(self):
+        from django.conf import settings
+        from apps.dyn_dt import registry
+        from . import versions
+        from .helpers import Utils
+
+        registry.API = registry.build(getattr(settings, 'DYNAMIC_API', {}), Utils.make_serializer)
+        versions.register_all()
@@ -3,33 +3,107 @@
 Copyright (c) 2019 - present AppSeed.us
 """
 
-import datetime, sys, inspect, importlib
+import datetime, sys, inspect, importlib, json
 
-from functools import wraps
+from functools import wraps, lru_cache
 
+from django.conf import settings
 from django.db import models
-from django.http import HttpResponseRedirect, HttpResponse
+from django.db.models import Q
+from django.http import HttpResponseRedirect, HttpResponse, StreamingHttpResponse
 
 from rest_framework import serializers
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.dyn_dt import registry, search
+
+# Pages longer than this are streamed, serialized this many objects at a time
+STREAM_CHUNK_SIZE = 200
+
+# Distinct serializer classes kept per process (one per model and ?fields= selection)
+SERIALIZER_CACHE_SIZE = 256
 
 class Utils:
+    @staticmethod
+    def get_entry(config, name: str):
+        """Startup registry entry for DYNAMIC_API slugs; built once per path for any other config."""
+        if config is getattr(settings, 'DYNAMIC_API', None):
+            return registry.API[name]
+        return Utils.entry_for_path(config[name])
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def entry_for_path(path: str):
+        return registry.build_entry(Utils.model_name_to_class(path), Utils.make_serializer)
+
     @staticmethod
     def get_class(config, name: str) -> models.Model:
-        return Utils.model_name_to_class(config[name])
+        return Utils.get_entry(config, name).model
 
     @staticmethod
     def get_manager(config, name: str) -> models.Manager:
         return Utils.get_class(config, name).objects
 
     @staticmethod
-    def get_serializer(config, name: str):
+    def get_serializer(config, name: str, fields=None):
+        """The model's serializer; `fields` (a ?fields= selection) narrows it to those columns."""
+        serializer = Utils.get_entry(config, name).serializer
+        if fields:
+            serializer = Utils.make_serializer(serializer.Meta.model, tuple(fields))
+        return serializer
+
+    @staticmethod
+    @lru_cache(maxsize=SERIALIZER_CACHE_SIZE)
+    def make_serializer(model, fields='__all__'):
+        """One serializer class per (model, fields) for the life of the process."""
         class Serializer(serializers.ModelSerializer):
             class Meta:
-                model = Utils.get_class(config, name)
-                fields = '__all__'
+                pass
 
+        Serializer.Meta.model = model
+        Serializer.Meta.fields = fields
         return Serializer
 
+    @staticmethod
+    def parse_fields(config, name: str, value):
+        """?fields=a,b -> ['a', 'b'], or None for all columns. Raises ValueError on unknown names."""
+        if not value:
+            return None
+        fields = [f.strip() for f in value.split(',') if f.strip()]
+        unknown = [f for f in fields if f not in Utils.get_entry(config, name).db_fields]
+        if unknown:
+            raise ValueError('unknown field(s): ' + ', '.join(unknown))
+        return fields
+
+    @staticmethod
+    def stream_page(serializer, page, links):
+        """
+        A page as {"data": [...], "next": ..., "previous": ..., "success": true},
+        serialized and sent STREAM_CHUNK_SIZE objects at a time.
+        """
+        def chunks():
+            yield '{"data": ['
+            for start in range(0, len(page), STREAM_CHUNK_SIZE):
+                data = serializer(page[start:start + STREAM_CHUNK_SIZE], many=True).data
+                yield (', ' if start else '') + json.dumps(data, cls=JSONEncoder)[1:-1]
+            yield '], %s, "success": true}' % json.dumps(links)[1:-1]
+
+        return StreamingHttpResponse(chunks(), content_type='application/json')
+
+    @staticmethod
+    def search(queryset, value: str):
+        """Rows matching `value`: the model's search index when it has one, else icontains on every column."""
+        indexed = search.search(queryset, value)
+        if indexed is not None:
+            return indexed
+
+        dynamic_q = Q()
+        for field in queryset.model._meta.concrete_fields:
+            if not field.is_relation:
+                dynamic_q |= Q(**{f'{field.name}__icontains': value})
+        return queryset.filter(dynamic_q)
+
     @staticmethod
     def model_name_to_class(name: str):
 
@@ -41,6 +115,13 @@ class Utils:
 
         return cls 
 
+class DynamicCursorPagination(CursorPagination):
+    """Keyset pages over the primary key; ?page_size= up to max_page_size."""
+    ordering = 'pk'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
 def check_permission(function):
     @wraps(function)
     def wrap(viewRequest, *args, **kwargs):
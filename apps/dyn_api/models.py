@@ -0,0 +1,11 @@
+from django.db import models
+
+# Create your models here.
+
+class ModelVersion(models.Model):
+    # One row per DYNAMIC_API model, bumped after every committed write (see versions.py)
+    label = models.CharField(max_length=255, unique=True)  # app_label.modelname
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.label} v{self.version}'
@@ -3,6 +3,106 @@
 Copyright (c) 2019 - present AppSeed.us
 """
 
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from apps.pages.models import Product
+
+
+class BulkWriteTests(TestCase):
+
+    def send(self, method, body):
+        return getattr(self.client, method)('/api/product/', json.dumps(body), content_type='application/json')
+
+    def test_bulk_create(self):
+        response = self.send('post', [{'name': 'a', 'info': 'x', 'price': 1}, {'name': 'b', 'price': None}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['message'], '2 Records Created.')
+        self.assertEqual(sorted(Product.objects.values_list('pk', flat=True)), sorted(response.json()['ids']))
+
+    def test_bulk_create_reports_errors_per_item(self):
+        response = self.send('post', [{'name': 'ok', 'price': 1}, {'name': 'bad', 'price': 'x'}, 'notadict'])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(errors[0], {})
+        self.assertIn('price', errors[1])
+        self.assertTrue(errors[2])
+        self.assertFalse(Product.objects.exists())
+
+    def test_bulk_update(self):
+        a = Product.objects.create(name='a', info='', price=1)
+        b = Product.objects.create(name='b', info='', price=2)
+        response = self.send('put', [{'id': a.pk, 'price': 10}, {'id': b.pk, 'name': 'bee'}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['message'], '2 Records Updated.')
+        self.assertEqual(list(Product.objects.order_by('pk').values_list('name', 'price')), [('a', 10), ('bee', 2)])
+
+    def test_bulk_update_reports_errors_per_item(self):
+        a = Product.objects.create(name='a', info='', price=1)
+        response = self.send('put', [{'id': a.pk, 'price': 5}, {'id': a.pk, 'price': 'x'}, {'id': 99999}, 7, {}])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertEqual(errors[0], {})
+        self.assertIn('price', errors[1])
+        for error in errors[2:]:
+            self.assertIn('id', error)
+        self.assertEqual(Product.objects.get(pk=a.pk).price, 1)
+
+    def test_single_object_post_unchanged(self):
+        response = self.send('post', {'name': 'one', 'info': 'x', 'price': 3})
+        self.assertEqual(response.json(), {'message': 'Record Created.', 'success': True})
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        self.product = Product.objects.create(name='a', info='', price=1)
+
+    def test_not_modified_until_a_write(self):
+        for path in ('/api/product/', f'/api/product/{self.product.pk}/', '/api/product/?fields=name'):
+            etag = self.client.get(path)['ETag']
+            self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304, path)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Product.objects.create(name='b', info='', price=2)
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertNotEqual(response['ETag'], etag)
+
+    def test_bulk_writes_invalidate(self):
+        etag = self.client.get('/api/product/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put('/api/product/', json.dumps([{'id': self.product.pk, 'price': 9}]),
+                            content_type='application/json')
+        self.assertEqual(self.client.get('/api/product/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_failed_write_keeps_the_etag(self):
+        etag = self.client.get('/api/product/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put('/api/product/', json.dumps([{'id': self.product.pk, 'price': 'x'}]),
+                            content_type='application/json')
+        self.assertEqual(self.client.get('/api/product/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_query_string_is_part_of_the_etag(self):
+        etag = self.client.get('/api/product/')['ETag']
+        self.assertEqual(self.client.get('/api/product/?fields=name', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_versions_do_not_depend_on_the_cache(self):
+        etag = self.client.get('/api/product/')['ETag']
+        self.assertEqual(self.client.get('/api/product/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/product/', json.dumps({'name': 'b', 'info': 'x', 'price': 2}),
+                             content_type='application/json')
+        self.assertEqual(self.client.get('/api/product/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_dyn_dt_batch_invalidates(self):
+        self.client.force_login(User.objects.create_user('api', password='x'))
+        etag = self.client.get('/api/product/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/batch/product/', json.dumps({'update': [{'id': self.product.pk, 'price': 7}]}),
+                             content_type='application/json')
+        self.assertEqual(self.client.get('/api/product/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,67 @@
+"""
+Per-model data versions for conditional API reads.
+
+Every DYNAMIC_API model has a ModelVersion row, bumped by post_save /
+post_delete and by dyn_dt's bulk_written signal (bulk writes skip the
+model signals). DynamicAPI hashes it into the ETag of its GET responses,
+so a polling client that sends If-None-Match gets a 304 after one indexed
+read, without the page query or serialization.
+
+The counter lives in the database, not the cache: it is shared by every
+worker process and works with any CACHE_BACKEND, dummy included. Bumps
+wait for the commit, so a reader never gets the old rows under the new
+version. Writes made outside Django (raw SQL, the loaders) do not bump it.
+"""
+import hashlib
+
+from django.db import transaction, DatabaseError
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+
+from apps.dyn_dt import registry
+from apps.dyn_dt.signals import bulk_written
+
+from .models import ModelVersion
+
+
+def current(model):
+    """The model's version, or None when the table is not there (migrations not run)."""
+    try:
+        version = ModelVersion.objects.filter(label=model._meta.label_lower).values_list('version', flat=True).first()
+    except DatabaseError:
+        return None
+    return version or 0
+
+
+def bump(model):
+    """Move `model` to a new version once the current transaction commits (right away outside one)."""
+    transaction.on_commit(lambda: _increment(model))
+
+
+def _increment(model):
+    label = model._meta.label_lower
+    if not ModelVersion.objects.filter(label=label).update(version=F('version') + 1):
+        _, created = ModelVersion.objects.get_or_create(label=label, defaults={'version': 1})
+        if not created:
+            ModelVersion.objects.filter(label=label).update(version=F('version') + 1)
+
+
+def etag(model, *parts):
+    """ETag of a response built from `model` rows, or None; `parts` tell apart the views of the same data."""
+    version = current(model)
+    if version is None:
+        return None
+    return hashlib.sha1(repr((model._meta.label_lower, version) + parts).encode('utf-8')).hexdigest()
+
+
+def register_all():
+    """Connect the bump signals for the API models; called from DynApiConfig.ready(), after the registry."""
+    for entry in registry.API.values():
+        uid = entry.model._meta.label_lower
+        post_save.connect(_on_change, sender=entry.model, dispatch_uid=f'dyn_api_version_save:{uid}')
+        post_delete.connect(_on_change, sender=entry.model, dispatch_uid=f'dyn_api_version_delete:{uid}')
+        bulk_written.connect(_on_change, sender=entry.model, dispatch_uid=f'dyn_api_version_bulk:{uid}')
+
+
+def _on_change(sender, **kwargs):
+    bump(sender)
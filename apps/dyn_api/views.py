@@ -7,6 +7,7 @@ from django.http import Http404
 
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.shortcuts import render, redirect, get_object_or_404
 
 from rest_framework.generics import get_object_or_404
@@ -15,6 +16,7 @@ from rest_framework.response import Response
 from django.http import HttpResponse
 
 from django.conf import settings
+from django.db import transaction
 
 DYNAMIC_API = {}
 
@@ -23,22 +25,40 @@ try:
 except:     
     pass 
 
-from .helpers import Utils 
+from .helpers import Utils, DynamicCursorPagination, STREAM_CHUNK_SIZE
+from apps.dyn_dt import registry, search
+from apps.dyn_dt.signals import bulk_written
+from . import versions
+
+# Bulk POST / PUT: rows per INSERT / UPDATE statement, items per request
+BULK_BATCH_SIZE = 500
+BULK_MAX_ITEMS = 10000
 
 def index(request):
     
     context = {
-        'routes' : settings.DYNAMIC_API.keys()
+        'routes' : registry.API.keys()
     }
 
     return render(request, 'dyn_api/index.html', context)
 
+def read_etag(request, **kwargs):
+    """ETag of a GET: the model's data version plus everything else the body depends on."""
+    entry = registry.API.get(kwargs.get('model_name'))
+    if entry is None:
+        return None
+    return versions.etag(entry.model, kwargs.get('id'), request.get_full_path(),
+                         request.META.get('HTTP_ACCEPT'), request.user.pk)
+
 class DynamicAPI(APIView):
 
     # READ : GET api/model/id or api/model
+    # Unchanged data answers If-None-Match with a 304, before any query
+    @method_decorator(condition(etag_func=read_etag))
     def get(self, request, **kwargs):
 
         model_id = kwargs.get('id', None)
+        links = {}
         try:
             if model_id is not None:
 
@@ -59,11 +79,29 @@ class DynamicAPI(APIView):
                 model_serializer = Utils.get_serializer(DYNAMIC_API, kwargs.get('model_name'))(instance=thing)
                 output = model_serializer.data
             else:
+                # Validate the sparse fieldset
+                try:
+                    fields = Utils.parse_fields(DYNAMIC_API, kwargs.get('model_name'), request.query_params.get('fields'))
+                except ValueError as e:
+                    return Response(data={
+                        'message': 'Input Error = ' + str(e),
+                        'success': False
+                    }, status=400)
+
                 all_things = Utils.get_manager(DYNAMIC_API, kwargs.get('model_name')).all()
-                thing_serializer = Utils.get_serializer(DYNAMIC_API, kwargs.get('model_name'))
-                output = []
-                for thing in all_things:
-                    output.append(thing_serializer(instance=thing).data)
+                if request.query_params.get('search'):
+                    all_things = Utils.search(all_things, request.query_params['search'])
+                if fields:
+                    all_things = all_things.only(*fields)
+
+                paginator = DynamicCursorPagination()
+                page = paginator.paginate_queryset(all_things, request, view=self)
+                links = {'next': paginator.get_next_link(), 'previous': paginator.get_previous_link()}
+
+                thing_serializer = Utils.get_serializer(DYNAMIC_API, kwargs.get('model_name'), fields)
+                if len(page) > STREAM_CHUNK_SIZE:
+                    return Utils.stream_page(thing_serializer, page, links)
+                output = thing_serializer(page, many=True).data
         except KeyError:
             return Response(data={
                 'message': 'this model is not activated or not exist.',
@@ -76,12 +114,15 @@ class DynamicAPI(APIView):
             }, status=404)
         return Response(data={
             'data': output,
+            **links,
             'success': True
             }, status=200)
 
     # CREATE : POST api/model/
     #@check_permission
     def post(self, request, **kwargs):
+        if isinstance(request.data, list):
+            return self.bulk_create(request, kwargs.get('model_name'))
         try:
             model_serializer = Utils.get_serializer(DYNAMIC_API, kwargs.get('model_name'))(data=request.data)
             if model_serializer.is_valid():
@@ -104,6 +145,8 @@ class DynamicAPI(APIView):
     # UPDATE : PUT api/model/id/
     #@check_permission
     def put(self, request, **kwargs):
+        if kwargs.get('id') is None and isinstance(request.data, list):
+            return self.bulk_update(request, kwargs.get('model_name'))
         try:
             thing = get_object_or_404(Utils.get_manager(DYNAMIC_API, kwargs.get('model_name')), id=kwargs.get('id'))
             model_serializer = Utils.get_serializer(DYNAMIC_API, kwargs.get('model_name'))(instance=thing,
@@ -131,6 +174,117 @@ class DynamicAPI(APIView):
             'success': True
             }, status=200)
 
+    # BULK CREATE : POST api/model/ with a JSON array
+    def bulk_create(self, request, model_name):
+        try:
+            model_serializer = Utils.get_serializer(DYNAMIC_API, model_name)(data=request.data, many=True)
+        except KeyError:
+            return Response(data={
+                'message': 'this model is not activated or not exist.',
+                'success': False
+            }, status=400)
+
+        if len(request.data) > BULK_MAX_ITEMS:
+            return Response(data={
+                'message': f'at most {BULK_MAX_ITEMS} items per request.',
+                'success': False
+            }, status=400)
+
+        # One error dict per item, empty for the valid ones; nothing is written unless all are valid
+        if not model_serializer.is_valid():
+            return Response(data={
+                'errors': model_serializer.errors,
+                'success': False
+            }, status=400)
+
+        model = Utils.get_class(DYNAMIC_API, model_name)
+        m2m = {f.name for f in model._meta.many_to_many}
+        things, relations = [], []
+        for item in model_serializer.validated_data:
+            relations.append({k: item.pop(k) for k in list(item) if k in m2m})
+            things.append(model(**item))
+
+        with transaction.atomic():
+            model.objects.bulk_create(things, batch_size=BULK_BATCH_SIZE)
+            for thing, related in zip(things, relations):
+                for name, values in related.items():
+                    getattr(thing, name).set(values)
+            search.index_objects(model, things)
+            bulk_written.send(sender=model, objs=things)
+
+        return Response(data={
+            'message': f'{len(things)} Records Created.',
+            'ids': [thing.pk for thing in things],
+            'success': True
+        }, status=200)
+
+    # BULK UPDATE : PUT api/model/ with a JSON array of objects carrying their id
+    def bulk_update(self, request, model_name):
+        try:
+            model = Utils.get_class(DYNAMIC_API, model_name)
+            serializer_class = Utils.get_serializer(DYNAMIC_API, model_name)
+        except KeyError:
+            return Response(data={
+                'message': 'this model is not activated or not exist.',
+                'success': False
+            }, status=400)
+
+        if len(request.data) > BULK_MAX_ITEMS:
+            return Response(data={
+                'message': f'at most {BULK_MAX_ITEMS} items per request.',
+                'success': False
+            }, status=400)
+
+        ids = []
+        for item in request.data:
+            try:
+                ids.append(int(item.get('id')))
+            except (AttributeError, TypeError, ValueError):
+                ids.append(None)
+        things = model.objects.in_bulk([i for i in ids if i is not None])
+
+        # Validate every item against its row (partial, like PUT api/model/id/), collecting errors per item
+        errors, changes = [], []
+        for item, model_id in zip(request.data, ids):
+            thing = things.get(model_id)
+            if thing is None:
+                errors.append({'id': ['object with given id not found.']})
+                continue
+            model_serializer = serializer_class(instance=thing, data=item, partial=True)
+            if model_serializer.is_valid():
+                errors.append({})
+                changes.append((thing, model_serializer.validated_data))
+            else:
+                errors.append(model_serializer.errors)
+
+        if any(errors):
+            return Response(data={
+                'errors': errors,
+                'success': False
+            }, status=400)
+
+        m2m = {f.name for f in model._meta.many_to_many}
+        fields = set()
+        for thing, data in changes:
+            for name, value in data.items():
+                if name not in m2m:
+                    setattr(thing, name, value)
+                    fields.add(name)
+
+        with transaction.atomic():
+            if fields:
+                model.objects.bulk_update([thing for thing, _ in changes], list(fields), batch_size=BULK_BATCH_SIZE)
+            for thing, data in changes:
+                for name in m2m & data.keys():
+                    getattr(thing, name).set(data[name])
+            search.index_objects(model, [thing for thing, _ in changes])
+            bulk_written.send(sender=model, objs=[thing for thing, _ in changes])
+
+        return Response(data={
+            'message': f'{len(changes)} Records Updated.',
+            'success': True
+        }, status=200)
+
     # DELETE : DELETE api/model/id/
     #@check_permission
     def delete(self, request, **kwargs):
@@ -3,3 +3,10 @@ from django.apps import AppConfig
 class DynDtConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.dyn_dt'
+
+    def ready(self):
+        from django.conf import settings
+        from apps.dyn_dt import registry, search
+
+        registry.DATATB = registry.build(getattr(settings, 'DYNAMIC_DATATB', {}))
+        search.register_all()
@@ -0,0 +1,68 @@
+"""
+Model registry for dyn_dt and dyn_api.
+
+Built once at startup (the apps' ready()) from DYNAMIC_DATATB and
+DYNAMIC_API: for every slug, the model class with its field lists, FK map
+and choices already worked out, plus the DRF serializer class for API
+slugs. Request handling then only does dict lookups instead of importing
+modules and walking _meta on every call.
+
+Both registries are read-only mappings; editing the settings (e.g. with
+the cli helpers) needs a restart, like any other settings change.
+"""
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+
+from django.db import models
+
+from cli import name_to_class
+
+
+class ModelEntry(NamedTuple):
+    model: type
+    db_fields: tuple              # concrete field names, in declaration order
+    fk_fields: MappingProxyType   # FK name -> related model class
+    filter_fields: tuple          # db_fields without the FKs
+    choices: MappingProxyType     # field name -> choices
+    integer_fields: tuple
+    date_time_fields: tuple
+    email_fields: tuple
+    text_fields: tuple
+    serializer: Optional[type]    # DRF serializer, API slugs only
+
+
+DATATB = MappingProxyType({})
+API = MappingProxyType({})
+
+
+def field_names(model, field_type):
+    return tuple(field.name for field in model._meta.get_fields() if isinstance(field, field_type))
+
+
+def build_entry(model, serializer=None):
+    fields = model._meta.fields
+    fk_fields = {f.name: f.related_model for f in fields if type(f) is models.ForeignKey}
+    return ModelEntry(
+        model=model,
+        db_fields=tuple(f.name for f in fields),
+        fk_fields=MappingProxyType(fk_fields),
+        filter_fields=tuple(f.name for f in fields if f.name not in fk_fields),
+        choices=MappingProxyType({f.name: f.choices for f in fields if f.choices}),
+        integer_fields=field_names(model, models.IntegerField),
+        date_time_fields=field_names(model, models.DateTimeField),
+        email_fields=field_names(model, models.EmailField),
+        text_fields=field_names(model, (models.TextField, models.CharField)),
+        serializer=serializer(model) if serializer else None,
+    )
+
+
+def build(config, serializer=None):
+    """SLUG -> Import_PATH settings dict -> read-only SLUG -> ModelEntry; unknown paths are skipped."""
+    entries = {}
+    for slug, path in (config or {}).items():
+        model = name_to_class(path)
+        if model is None:
+            print(f' > ERR: Getting ModelClass for path: {slug} ({path})')
+            continue
+        entries[slug] = build_entry(model, serializer)
+    return MappingProxyType(entries)
@@ -0,0 +1,150 @@
+"""
+Opt-in search index for dyn_dt / dyn_api models.
+
+Slugs listed in DYNAMIC_DATATB_SEARCH get an index over the model's text
+columns (CharField / TextField), created on first use:
+
+* SQLite: an FTS5 shadow table with the trigram tokenizer, so a term
+  matches anywhere inside a value like icontains does. Its rowid is the
+  model's pk; post_save / post_delete signals keep it in sync.
+* PostgreSQL: a pg_trgm GIN index on the lower-cased, concatenated text
+  columns, maintained by the database itself.
+
+search() ORs the index hits with icontains on the columns the index does
+not cover (numbers, dates, ...), so results match the plain scan. It
+returns None when the model is not indexed, the backend has no support
+(or, on SQLite, the pk is not an integer rowid) or the term is shorter
+than a trigram; callers then fall back to their icontains scan.
+"""
+from django.conf import settings
+from django.db import connection, transaction, DatabaseError, models
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save, post_delete
+
+from apps.dyn_dt import registry
+
+MIN_TERM = 3  # trigrams need at least three characters
+
+INDEXED = set()      # models opted in through DYNAMIC_DATATB_SEARCH
+_ready = set()       # models whose index exists in this process
+_unavailable = set() # models whose index could not be created
+
+
+def register_all():
+    """Opt models in and connect the sync signals; called from DynDtConfig.ready(), after the registry."""
+    for slug in getattr(settings, 'DYNAMIC_DATATB_SEARCH', ()):
+        if slug not in registry.DATATB:
+            continue
+        model = registry.DATATB[slug].model
+        INDEXED.add(model)
+        uid = model._meta.label_lower
+        post_save.connect(_on_save, sender=model, dispatch_uid=f'dyn_dt_search_save:{uid}')
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f'dyn_dt_search_delete:{uid}')
+
+
+def indexable(model):
+    # The SQLite index is keyed on rowid, which has to be the model's pk
+    return connection.vendor != 'sqlite' or isinstance(model._meta.pk, models.IntegerField)
+
+
+def index_fields(model):
+    return [f for f in model._meta.concrete_fields if isinstance(f, (models.CharField, models.TextField))]
+
+
+def table_name(model):
+    return f'{model._meta.db_table}_search'
+
+
+def document(obj):
+    return ' '.join(str(getattr(obj, f.attname) or '') for f in index_fields(type(obj)))
+
+
+def _pg_document(model):
+    qn = connection.ops.quote_name
+    return "lower(%s)" % " || ' ' || ".join(f"coalesce({qn(f.column)}, '')" for f in index_fields(model))
+
+
+def ensure_index(model):
+    """Create (and fill) the model's index if needed. False when it is not available."""
+    if model in _ready:
+        return True
+    if model in _unavailable or not index_fields(model) or not indexable(model):
+        return False
+
+    qn = connection.ops.quote_name
+    table = table_name(model)
+    try:
+        with transaction.atomic(), connection.cursor() as cur:
+            if connection.vendor == 'sqlite':
+                if table not in connection.introspection.table_names(cur):
+                    cur.execute(f"CREATE VIRTUAL TABLE {qn(table)} USING fts5(body, tokenize = 'trigram')")
+                    rows = ((obj.pk, document(obj)) for obj in model._default_manager.iterator())
+                    cur.executemany(f'INSERT INTO {qn(table)} (rowid, body) VALUES (%s, %s)', rows)
+            elif connection.vendor == 'postgresql':
+                cur.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+                cur.execute(f'CREATE INDEX IF NOT EXISTS {qn(table)} ON {qn(model._meta.db_table)} '
+                            f'USING gin (({_pg_document(model)}) gin_trgm_ops)')
+            else:
+                raise DatabaseError(f'no search index support for {connection.vendor}')
+    except DatabaseError as e:
+        print(f' > Search index unavailable for {model.__name__}: {e}')
+        _unavailable.add(model)
+        return False
+
+    _ready.add(model)
+    return True
+
+
+def search(queryset, value, fields=None):
+    """
+    `queryset` narrowed to rows where one of `fields` (default: every
+    non-relation column) contains `value`, or None (not indexed).
+    """
+    model = queryset.model
+    value = (value or '').strip()
+    if model not in INDEXED or len(value) < MIN_TERM or not ensure_index(model):
+        return None
+
+    qn = connection.ops.quote_name
+    if connection.vendor == 'sqlite':
+        table = qn(table_name(model))
+        phrase = '"%s"' % value.replace('"', '""')
+        hits = RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', (phrase,))
+    else:
+        pattern = '%%%s%%' % value.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        hits = RawSQL(f'SELECT {qn(model._meta.pk.column)} FROM {qn(model._meta.db_table)} '
+                      f'WHERE {_pg_document(model)} LIKE %s', (pattern,))
+
+    covered = {f.name for f in index_fields(model)}
+    if fields is None:
+        fields = [f.name for f in model._meta.concrete_fields if not f.is_relation]
+    dynamic_q = Q(pk__in=hits)
+    for field in fields:
+        if field not in covered:
+            dynamic_q |= Q(**{f'{field}__icontains': value})
+    return queryset.filter(dynamic_q)
+
+
+def _on_save(sender, instance, **kwargs):
+    if sender not in INDEXED or connection.vendor != 'sqlite' or not ensure_index(sender):
+        return
+    with connection.cursor() as cur:
+        cur.execute(f'INSERT OR REPLACE INTO {connection.ops.quote_name(table_name(sender))} (rowid, body) '
+                    f'VALUES (%s, %s)', (instance.pk, document(instance)))
+
+
+def _on_delete(sender, instance, **kwargs):
+    if sender not in INDEXED or connection.vendor != 'sqlite' or not ensure_index(sender):
+        return
+    with connection.cursor() as cur:
+        cur.execute(f'DELETE FROM {connection.ops.quote_name(table_name(sender))} WHERE rowid = %s', (instance.pk,))
+
+
+def index_objects(model, objs):
+    """Sync rows written without signals (bulk_create / bulk_update)."""
+    if model not in INDEXED or connection.vendor != 'sqlite' or not ensure_index(model):
+        return
+    with connection.cursor() as cur:
+        cur.executemany(f'INSERT OR REPLACE INTO {connection.ops.quote_name(table_name(model))} (rowid, body) '
+                        f'VALUES (%s, %s)', [(obj.pk, document(obj)) for obj in objs])
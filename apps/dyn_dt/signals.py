@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent after bulk_create / bulk_update / queryset writes that skip the model signals.
+# sender: the model class; objs: the rows written (may be empty for deletes).
+bulk_written = Signal()
@@ -1,3 +1,206 @@
-from django.test import TestCase
+import base64, io, json
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.db import connection
+from django.db.models.signals import post_save, post_delete
+from django.test import TestCase, TransactionTestCase
+
+from apps.dyn_dt import search
+from apps.dyn_dt.models import HideShowFilter
+from apps.dyn_dt.views import export_csv, export_ndjson, export_parquet
+from apps.dyn_dt.utils import search_filter, keyset_page, encode_cursor, invalidate_view_config, DEFAULT_PAGE_ITEMS
+from apps.pages.models import Product
+from wallet.models import Goal
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+class BatchTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('batch', password='x'))
+        self.kept = Product.objects.create(name='kept', info='a', price=1)
+        self.gone = Product.objects.create(name='gone', info='b', price=2)
+
+    def post(self, body):
+        return self.client.post('/batch/product/', json.dumps(body), content_type='application/json')
+
+    def test_create_update_delete(self):
+        response = self.post({
+            'create': [{'name': 'new', 'info': 'c', 'price': '3'}, {'name': 'free', 'price': ''}],
+            'update': [{'id': self.kept.pk, 'price': 10}],
+            'delete': [self.gone.pk],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'created': 2, 'updated': 1, 'deleted': 1, 'success': True})
+        self.assertEqual(Product.objects.get(pk=self.kept.pk).price, 10)
+        self.assertFalse(Product.objects.filter(pk=self.gone.pk).exists())
+        self.assertIsNone(Product.objects.get(name='free').price)
+
+    def assertRejected(self, body, error):
+        before = list(Product.objects.order_by('pk').values_list('pk', 'name', 'price'))
+        response = self.post(body)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+        self.assertIn(error, response.json()['error'])
+        self.assertEqual(before, list(Product.objects.order_by('pk').values_list('pk', 'name', 'price')))
+
+    def test_non_dict_row(self):
+        self.assertRejected({'create': ['notadict']}, 'create[0]: expected object')
+        self.assertRejected({'update': [{'id': self.kept.pk}, 5]}, 'update[1]: expected object')
+
+    def test_unknown_field_rolls_back(self):
+        self.assertRejected({'create': [{'name': 'x'}], 'update': [{'id': self.kept.pk, 'nope': 1}]},
+                            'update[0]: unknown field nope')
+
+    def test_missing_row(self):
+        self.assertRejected({'update': [{'id': 99999, 'price': 1}]}, 'no row with id 99999')
+
+    def test_bad_body(self):
+        response = self.client.post('/batch/product/', '[1, 2]', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_login_required(self):
+        self.client.logout()
+        self.assertEqual(self.post({'create': []}).status_code, 302)
+
+
+class SearchIndexTests(TransactionTestCase):
+    """With the index on, search results are the same rows as the old icontains scan."""
+
+    def setUp(self):
+        search.INDEXED.add(Product)
+        post_save.connect(search._on_save, sender=Product, dispatch_uid='test_search_save')
+        post_delete.connect(search._on_delete, sender=Product, dispatch_uid='test_search_delete')
+        for name, info, price in [('Blue Bottle', 'coffee beans', 1250), ('Table lamp', 'brass', 42),
+                                  ('Lamp shade', '', None), ('Kettle', 'Blue steel', 2024)]:
+            Product.objects.create(name=name, info=info, price=price)
+
+    def tearDown(self):
+        post_save.disconnect(sender=Product, dispatch_uid='test_search_save')
+        post_delete.disconnect(sender=Product, dispatch_uid='test_search_delete')
+        search.INDEXED.discard(Product)
+        search._ready.discard(Product)
+        with connection.cursor() as cur:
+            cur.execute(f'DROP TABLE IF EXISTS {search.table_name(Product)}')
+
+    def icontains(self, value, fields):
+        dynamic_q = Q()
+        for field in fields:
+            dynamic_q |= Q(**{f'{field}__icontains': value})
+        return set(Product.objects.filter(dynamic_q))
+
+    def test_matches_icontains(self):
+        fields = ['id', 'name', 'info', 'price']
+        for value in ['blue', 'LAMP', 'ble', 'steel', '125', '202', '42', 'nothing here']:
+            self.assertEqual(set(search_filter(Product.objects.all(), value, fields)),
+                             self.icontains(value, fields), value)
+        self.assertIn(Product, search._ready)
+
+    def test_follows_saves_and_deletes(self):
+        kettle = Product.objects.get(name='Kettle')
+        kettle.name = 'Teapot'
+        kettle.save()
+        self.assertEqual(list(search.search(Product.objects.all(), 'teapot')), [kettle])
+        kettle.delete()
+        self.assertEqual(list(search.search(Product.objects.all(), 'teapot')), [])
+
+    def test_short_terms_and_unindexed_models_fall_back(self):
+        self.assertIsNone(search.search(Product.objects.all(), 'bl'))
+        search.INDEXED.discard(Product)
+        self.assertIsNone(search.search(Product.objects.all(), 'blue'))
+
+
+class KeysetPageTests(TestCase):
+
+    def setUp(self):
+        prices = [5, None, 3, 5, None, 1, 3, 5, None, 8, 2]
+        for i, price in enumerate(prices):
+            Product.objects.create(name=f'p{i % 4}', info='', price=price)
+
+    def expected(self, field):
+        # NULLs first, then the value, ties broken by pk
+        rows = list(Product.objects.all())
+        return [p.pk for p in sorted(rows, key=lambda p: (getattr(p, field) is not None, getattr(p, field) or 0, p.pk))]
+
+    def walk(self, field, per_page):
+        pages, cursor = [], None
+        while True:
+            page = keyset_page(Product.objects.all(), field, cursor, per_page)
+            pages.append([p.pk for p in page])
+            if not page.has_next():
+                return pages, page
+            cursor = page.next_cursor
+
+    def test_forward_and_back(self):
+        for field in ('price', 'name', 'id'):
+            for per_page in (1, 3, 4, 20):
+                pages, last = self.walk(field, per_page)
+                self.assertEqual(sum(pages, []), self.expected(field), (field, per_page))
+                self.assertFalse(keyset_page(Product.objects.all(), field, None, per_page).has_previous())
+
+                back, page = [pages[-1]], last
+                while page.has_previous():
+                    page = keyset_page(Product.objects.all(), field, page.previous_cursor, per_page)
+                    back.append([p.pk for p in page])
+                self.assertEqual(back[::-1], pages, (field, per_page))
+
+    def test_bad_cursor_starts_over(self):
+        first = [p.pk for p in keyset_page(Product.objects.all(), 'price', None, 3)]
+        self.assertEqual([p.pk for p in keyset_page(Product.objects.all(), 'price', 'not-a-cursor', 3)], first)
+
+    def test_tampered_cursor_starts_over(self):
+        first = [p.pk for p in keyset_page(Product.objects.all(), 'price', None, 3)]
+        forged = [
+            encode_cursor(1, 'abc', 'next'),
+            encode_cursor('abc', 1, 'next'),
+            encode_cursor(1, None, 'prev'),
+            encode_cursor([1], {}, 'next'),
+            encode_cursor(1, 1, 'sideways'),
+            base64.urlsafe_b64encode(b'[1, 2]').decode(),
+        ]
+        for cursor in forged:
+            self.assertEqual([p.pk for p in keyset_page(Product.objects.all(), 'price', cursor, 3)], first, cursor)
+
+        self.client.force_login(User.objects.create_user('keyset', password='x'))
+        first = [p.pk for p in keyset_page(Product.objects.all(), 'price', None, DEFAULT_PAGE_ITEMS)]
+        with mock.patch('apps.dyn_dt.views.PAGINATION', 'keyset'):
+            for cursor in forged:
+                response = self.client.get('/dynamic-dt/product/', {'order_by': 'price', 'cursor': cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([p.pk for p in response.context['items']], first)
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('exporter', password='x')
+        self.client.force_login(self.user)
+        self.goal = Goal.objects.create(user=self.user, category='Dining', limit_amount=300,
+                                        period_start='2026-03-01', period_end='2026-03-31')
+        Product.objects.create(name='lamp', info='brass', price=42)
+
+    def test_foreign_keys_export_their_display_value(self):
+        fields = ['id', 'user', 'category']
+        self.assertEqual(''.join(export_csv(Goal.objects.all(), fields)),
+                         f'id,user,category\r\n{self.goal.pk},exporter,Dining\r\n')
+        self.assertEqual(json.loads(''.join(export_ndjson(Goal.objects.all(), fields))),
+                         {'id': self.goal.pk, 'user': 'exporter', 'category': 'Dining'})
+
+    @skipUnless(pq, 'Parquet export needs pyarrow')
+    def test_parquet_foreign_keys_are_text(self):
+        data = b''.join(export_parquet(Goal.objects.all(), ['id', 'user'], 'snappy'))
+        table = pq.read_table(io.BytesIO(data))
+        self.assertEqual(str(table.schema.field('user').type), 'string')
+        self.assertEqual(table.to_pylist(), [{'id': self.goal.pk, 'user': 'exporter'}])
+
+    def test_every_column_hidden(self):
+        self.assertEqual(self.client.get('/export-csv/product/').status_code, 200)
+        HideShowFilter.objects.filter(parent='product').update(value=True)
+        invalidate_view_config('product')
+        self.assertEqual(self.client.get('/export-csv/product/').status_code, 400)
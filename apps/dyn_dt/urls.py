@@ -11,8 +11,12 @@ urlpatterns = [
     path('create/<str:aPath>/', views.create, name="create"),
     path('delete/<str:aPath>/<int:id>/', views.delete, name="delete"),
     path('update/<str:aPath>/<int:id>/', views.update, name="update"),
+    path('batch/<str:aPath>/', views.batch, name="batch"),
 
     path('export-csv/<str:aPath>/', views.ExportCSVView.as_view(), name='export_csv'),
+    path('fk-autocomplete/<str:aPath>/<str:field>/', views.fk_autocomplete, name='fk_autocomplete'),
 
     path('dynamic-dt/<str:aPath>/', views.model_dt, name="model_dt"),
+    path('dynamic-dt/<str:aPath>/count/', views.model_count, name="model_count"),
+    path('dynamic-dt/<str:aPath>/data/', views.model_data, name="model_data"),
 ]
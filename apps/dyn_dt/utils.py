@@ -1,13 +1,187 @@
-from django.db.models import Q
+import base64, json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+from apps.dyn_dt import search
+from apps.dyn_dt.models import ModelFilter, PageItems, HideShowFilter
+
+CONFIG_CACHE_PREFIX = 'dyn_dt:config'
+DEFAULT_PAGE_ITEMS = 25
 
 def user_filter(request, queryset, fields, fk_fields=[]):
-    value = request.GET.get('search')
-    
+    return search_filter(queryset, request.GET.get('search'), fields, fk_fields)
+
+
+def search_filter(queryset, value, fields, fk_fields=[]):
     if value:
+        non_fk = [field for field in fields if field not in fk_fields]
+        indexed = search.search(queryset, value, non_fk)
+        if indexed is not None:
+            return indexed
+
         dynamic_q = Q()
         for field in fields:
             if field not in fk_fields:
                 dynamic_q |= Q(**{f'{field}__icontains': value})
         return queryset.filter(dynamic_q)
 
-    return queryset
\ No newline at end of file
+    return queryset
+
+
+def config_filters(config, db_fields):
+    """The model's saved ModelFilter rows as queryset filter kwargs."""
+    return {
+        f'{filter_data.key}__icontains': filter_data.value
+        for filter_data in config['filters'] if filter_data.key in db_fields
+    }
+
+
+def view_config_key(model_name):
+    return f'{CONFIG_CACHE_PREFIX}:{model_name.lower()}'
+
+
+def get_view_config(model_name, db_fields):
+    """
+    Hide/show flags (by field), filters and page size for a model's table.
+    Cached per model slug until one of the config views calls
+    invalidate_view_config; missing hide/show rows are bulk-created.
+    """
+    model_name = model_name.lower()
+    key = view_config_key(model_name)
+    config = cache.get(key)
+    if config is not None and all(f in config['hide_show'] for f in db_fields):
+        return config
+
+    hide_show = {}
+    for item in HideShowFilter.objects.filter(parent=model_name).order_by('id'):
+        hide_show.setdefault(item.key, item)
+
+    missing = [HideShowFilter(parent=model_name, key=f) for f in db_fields if f not in hide_show]
+    if missing:
+        HideShowFilter.objects.bulk_create(missing)
+        hide_show.update((item.key, item) for item in missing)
+
+    page_items = PageItems.objects.filter(parent=model_name).last()
+    config = {
+        'hide_show': hide_show,
+        'filters': list(ModelFilter.objects.filter(parent=model_name)),
+        'page_items': page_items.items_per_page if page_items else DEFAULT_PAGE_ITEMS,
+    }
+    cache.set(key, config)
+    return config
+
+
+def invalidate_view_config(model_name):
+    cache.delete(view_config_key(model_name))
+
+
+def encode_cursor(value, pk, direction):
+    data = json.dumps([value, pk, direction], cls=DjangoJSONEncoder)
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(value, pk, direction) or None for a missing / malformed cursor."""
+    try:
+        value, pk, direction = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    if direction not in ('next', 'prev'):
+        return None
+    return value, pk, direction
+
+
+def clean_cursor(field, position):
+    """The decoded cursor with its value and pk as Python values, or None when they don't fit the fields."""
+    if position is None:
+        return None
+    value, pk, direction = position
+    target = field.target_field if field.is_relation else field
+    try:
+        if value is not None:
+            value = target.to_python(value)
+        pk = field.model._meta.pk.to_python(pk)
+    except (ValidationError, ValueError, TypeError):
+        return None
+    if pk is None:
+        return None
+    return value, pk, direction
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset; iterates like a Paginator page."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def keyset_page(queryset, order_by, cursor, per_page):
+    """
+    Page through `queryset` ordered by (order_by, pk), NULLs first, seeking
+    from the cursor's row instead of using OFFSET and never counting. Pages
+    cost the same however deep they are.
+    """
+    field = queryset.model._meta.get_field(order_by)
+    order_by = field.attname  # FKs seek on the raw id
+    by_pk = order_by == queryset.model._meta.pk.attname
+    position = clean_cursor(field, decode_cursor(cursor)) if cursor else None
+    backwards = position is not None and position[2] == 'prev'
+
+    if by_pk:
+        ordering = ['-pk' if backwards else 'pk']
+    elif backwards:
+        ordering = [F(order_by).desc(nulls_last=True), '-pk']
+    else:
+        ordering = [F(order_by).asc(nulls_first=True), 'pk']
+
+    if position is not None:
+        value, pk, _ = position
+        if by_pk:
+            seek = Q(pk__lt=pk) if backwards else Q(pk__gt=pk)
+        elif value is None:
+            seek = (Q(**{f'{order_by}__isnull': True}, pk__lt=pk) if backwards else
+                    Q(**{f'{order_by}__isnull': True}, pk__gt=pk) | Q(**{f'{order_by}__isnull': False}))
+        elif backwards:
+            seek = (Q(**{f'{order_by}__lt': value}) | Q(**{order_by: value}, pk__lt=pk)
+                    | Q(**{f'{order_by}__isnull': True}))
+        else:
+            seek = Q(**{f'{order_by}__gt': value}) | Q(**{order_by: value}, pk__gt=pk)
+        queryset = queryset.filter(seek)
+
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def key(row, direction):
+        value = row.pk if by_pk else getattr(row, order_by)
+        return encode_cursor(value, row.pk, direction)
+
+    has_next = more if not backwards else position is not None
+    has_previous = position is not None if not backwards else more
+    return KeysetPage(
+        rows,
+        key(rows[-1], 'next') if rows and has_next else None,
+        key(rows[0], 'prev') if rows and has_previous else None,
+    )
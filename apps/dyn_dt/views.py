@@ -1,28 +1,53 @@
-import requests, base64, json, csv
+import requests, base64, json, csv, hashlib, io, zlib
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.safestring import mark_safe
 from django.conf import settings
 from django.urls import reverse
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.urls import reverse
 from django.views import View
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction, IntegrityError
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
 from pprint import pp 
 
+from apps.dyn_dt import registry, search
+from apps.dyn_dt.signals import bulk_written
 from apps.dyn_dt.models import ModelFilter, PageItems, HideShowFilter
-from apps.dyn_dt.utils import user_filter
+from apps.dyn_dt.utils import user_filter, search_filter, config_filters, get_view_config, invalidate_view_config, keyset_page
 
 from cli import *
 
 # Create your views here.
 
+# Rows per INSERT / UPDATE statement in batch()
+BATCH_SIZE = 500
+
+# Rows per values_list fetch (and per Parquet row group) when exporting
+EXPORT_CHUNK_SIZE = 2000
+
+# 'offset' or 'keyset', or a dict of slug -> mode
+PAGINATION = getattr(settings, 'DYNAMIC_DATATB_PAGINATION', 'offset')
+
+# Rows per DataTables request at most
+DATA_MAX_LENGTH = 500
+
+# Keyset pages show a total fetched after load; it may lag writes by this much
+COUNT_TIMEOUT = 60
+
+# FK dropdown options per autocomplete request; never searched: secrets
+FK_PAGE_SIZE = 20
+FK_SKIP_FIELDS = ('password', )
+
 def index(request):
     
     context = {
-        'routes' : settings.DYNAMIC_DATATB.keys()
+        'routes' : registry.DATATB.keys()
     }
 
     return render(request, 'dyn_dt/index.html', context)
@@ -41,6 +66,7 @@ def create_filter(request, model_name):
                 key=key,
                 defaults={'value': value}
             )
+        invalidate_view_config(model_name)
 
         return redirect(reverse('model_dt', args=[model_name]))
 
@@ -53,6 +79,7 @@ def create_page_items(request, model_name):
             parent=model_name,
             defaults={'items_per_page':items}
         )
+        invalidate_view_config(model_name)
         return redirect(reverse('model_dt', args=[model_name]))
 
 
@@ -67,6 +94,7 @@ def create_hide_show_filter(request, model_name):
             key=data.get('key'),
             defaults={'value': data.get('value')}
         )
+        invalidate_view_config(model_name)
 
         response_data = {'message': 'Model updated successfully'}
         return JsonResponse(response_data)
@@ -78,88 +106,58 @@ def delete_filter(request, model_name, id):
     model_name = model_name.lower()
     filter_instance = ModelFilter.objects.get(id=id, parent=model_name)
     filter_instance.delete()
+    invalidate_view_config(model_name)
     return redirect(reverse('model_dt', args=[model_name]))
 
 
-def get_model_field_names(model, field_type):
-    """Returns a list of field names based on the given field type."""
-    return [
-        field.name for field in model._meta.get_fields() 
-        if isinstance(field, field_type)
-    ]
-
 def model_dt(request, aPath):
-    aModelName  = None
-    aModelClass = None
-    choices_dict = {}
-
-    if aPath in settings.DYNAMIC_DATATB.keys():
-        aModelName  = settings.DYNAMIC_DATATB[aPath]
-        aModelClass = name_to_class(aModelName)
+    entry = registry.DATATB.get(aPath)
+    aModelClass = entry.model if entry else None
 
     if not aModelClass:
         return HttpResponse( ' > ERR: Getting ModelClass for path: ' + aPath )
     
-    #db_fields = [field.name for field in aModelClass._meta.get_fields() if not field.is_relation]
-    db_fields = [field.name for field in aModelClass._meta.fields]
-    fk_fields = get_model_fk_values(aModelClass)
-    db_filters = []
-    for f in db_fields:
-        if f not in fk_fields.keys():
-            db_filters.append( f )
-
-    for field in aModelClass._meta.fields:
-        if field.choices:
-            choices_dict[field.name] = field.choices
-
-    field_names = []
-    for field_name in db_fields:
-        fields, created = HideShowFilter.objects.get_or_create(key=field_name, parent=aPath.lower())
-        if fields.key in db_fields:
-            field_names.append(fields)
-    
-    model_series = {}
-    for f in db_fields:
-        f_values = list ( aModelClass.objects.values_list( f, flat=True) )
-        model_series[ f ] = ', '.join( str(i) for i in f_values)
+    db_fields = list(entry.db_fields)
+    fk_fields = entry.fk_fields
+    db_filters = list(entry.filter_fields)
+    choices_dict = dict(entry.choices)
 
+    config = get_view_config(aPath, db_fields)
+    field_names = [config['hide_show'][f] for f in db_fields]
+    
     # model filter
-    filter_string = {}
-    filter_instance = ModelFilter.objects.filter(parent=aPath.lower())
-    for filter_data in filter_instance:
-        if filter_data.key in db_fields: 
-            filter_string[f'{filter_data.key}__icontains'] = filter_data.value
+    filter_instance = config['filters']
+    filter_string = config_filters(config, db_fields)
 
     order_by = request.GET.get('order_by', 'id')
     if order_by not in db_fields:
         order_by = 'id'
     
-    queryset = aModelClass.objects.filter(**filter_string).order_by(order_by)
+    queryset = aModelClass.objects.filter(**filter_string).select_related(*fk_fields).order_by(order_by)
     item_list = user_filter(request, queryset, db_fields, fk_fields.keys())
 
     # pagination
-    page_items = PageItems.objects.filter(parent=aPath.lower()).last()
-    p_items = 25
-    if page_items:
-        p_items = page_items.items_per_page
-
-    page = request.GET.get('page', 1)
-    paginator = Paginator(item_list, p_items)
-
-    try:
-        items = paginator.page(page)
-    except PageNotAnInteger:
-        return redirect(reverse('model_dt', args=[aPath]))
-    except EmptyPage:
-        return redirect(reverse('model_dt', args=[aPath]))
+    p_items = config['page_items']
+    keyset = pagination_mode(aPath) == 'keyset'
+    virtual = request.GET.get('view') == 'virtual'
+
+    if virtual:
+        items = []  # rows come from model_data as the table scrolls
+    elif keyset:
+        items = keyset_page(item_list, order_by, request.GET.get('cursor'), p_items)
+    else:
+        page = request.GET.get('page', 1)
+        paginator = Paginator(item_list, p_items)
+
+        try:
+            items = paginator.page(page)
+        except PageNotAnInteger:
+            return redirect(reverse('model_dt', args=[aPath]))
+        except EmptyPage:
+            return redirect(reverse('model_dt', args=[aPath]))
     
     read_only_fields = ('id', )
 
-    integer_fields = get_model_field_names(aModelClass, models.IntegerField)
-    date_time_fields = get_model_field_names(aModelClass, models.DateTimeField)
-    email_fields = get_model_field_names(aModelClass, models.EmailField)
-    text_fields = get_model_field_names(aModelClass, (models.TextField, models.CharField))
-    
     context = {
         'page_title': 'Dynamic DataTable - ' + aPath.lower().title(),
         'link': aPath,
@@ -171,31 +169,167 @@ def model_dt(request, aPath):
         'filter_instance': filter_instance,
         'read_only_fields': read_only_fields,
 
-        'integer_fields': integer_fields,
-        'date_time_fields': date_time_fields,
-        'email_fields': email_fields,
-        'text_fields': text_fields,
+        'integer_fields': entry.integer_fields,
+        'date_time_fields': entry.date_time_fields,
+        'email_fields': entry.email_fields,
+        'text_fields': entry.text_fields,
         'fk_fields_keys': list( fk_fields.keys() ),
         'fk_fields': fk_fields ,
         'choices_dict': choices_dict,
+        'keyset': keyset and not virtual,
+        'virtual': virtual,
     }
+    if keyset and not virtual:
+        context['next_url'] = cursor_url(request, items.next_cursor)
+        context['previous_url'] = cursor_url(request, items.previous_cursor)
+        context['count_url'] = reverse('model_count', args=[aPath]) + '?' + request.GET.urlencode()
     return render(request, 'dyn_dt/model.html', context)
 
 
+def pagination_mode(aPath):
+    """'offset' (numbered pages) or 'keyset' (cursor, no COUNT); per slug when the setting is a dict."""
+    mode = PAGINATION
+    if isinstance(mode, dict):
+        mode = mode.get(aPath, 'offset')
+    return mode
+
+
+def cursor_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params.pop('page', None)
+    params['cursor'] = cursor
+    return '?' + params.urlencode()
+
+
+def cached_count(aPath, filter_string, search_value, queryset):
+    """queryset.count(), cached per model / filters / search for COUNT_TIMEOUT."""
+    key = 'dyn_dt:count:%s:%s' % (aPath.lower(), hashlib.md5(
+        json.dumps([filter_string, search_value or '']).encode()).hexdigest())
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_TIMEOUT)
+    return count
+
+
+def model_count(request, aPath):
+    """Row count for a keyset-paginated table, fetched by the page after it renders."""
+    entry = registry.DATATB.get(aPath)
+    aModelClass = entry.model if entry else None
+
+    if not aModelClass:
+        return JsonResponse({'error': 'Unknown model: ' + aPath}, status=404)
+
+    config = get_view_config(aPath, entry.db_fields)
+    filter_string = config_filters(config, entry.db_fields)
+    queryset = user_filter(request, aModelClass.objects.filter(**filter_string), entry.db_fields, entry.fk_fields.keys())
+
+    return JsonResponse({'count': cached_count(aPath, filter_string, request.GET.get('search'), queryset)})
+
+
+def model_data(request, aPath):
+    """
+    DataTables server-side protocol (draw / start / length / order / search)
+    over model_dt's filtering, for the virtual-scrolling table: only the
+    rows in view are read, and both totals come from cached counts.
+    """
+    entry = registry.DATATB.get(aPath)
+    aModelClass = entry.model if entry else None
+
+    if not aModelClass:
+        return JsonResponse({'error': 'Unknown model: ' + aPath}, status=404)
+
+    try:
+        draw = int(request.GET.get('draw', 0))
+        start = max(int(request.GET.get('start', 0)), 0)
+        length = int(request.GET.get('length', DATA_MAX_LENGTH))
+    except ValueError:
+        return JsonResponse({'error': 'draw, start and length must be integers'}, status=400)
+    if length < 0 or length > DATA_MAX_LENGTH:
+        length = DATA_MAX_LENGTH  # -1 means "all" in the protocol; never unbounded here
+
+    db_fields = entry.db_fields
+    order_by = 'id'
+    column = request.GET.get('order[0][column]', '')
+    if column.isdigit() and int(column) < len(db_fields):
+        order_by = db_fields[int(column)]
+    if request.GET.get('order[0][dir]') == 'desc':
+        order_by = '-' + order_by
+
+    config = get_view_config(aPath, db_fields)
+    filter_string = config_filters(config, db_fields)
+    search_value = request.GET.get('search[value]', '').strip()
+
+    queryset = aModelClass.objects.filter(**filter_string)
+    filtered = search_filter(queryset, search_value, db_fields, entry.fk_fields.keys())
+
+    attnames = [aModelClass._meta.get_field(f).attname for f in db_fields]
+    rows = filtered.order_by(order_by, 'pk').values_list(*attnames)[start:start + length]
+
+    return JsonResponse({
+        'draw': draw,
+        'recordsTotal': cached_count(aPath, filter_string, '', queryset),
+        'recordsFiltered': cached_count(aPath, filter_string, search_value, filtered) if search_value else
+                           cached_count(aPath, filter_string, '', queryset),
+        'data': [dict(zip(db_fields, row)) for row in rows],
+    })
+
+
 @login_required(login_url='/accounts/login/')
-def create(request, aPath):
-    aModelClass = None
+def fk_autocomplete(request, aPath, field):
+    """
+    Options for one FK dropdown, a page at a time: ?q= matches the start of
+    any text column of the related model (or its id), ?page= is 1-based.
+    """
+    entry = registry.DATATB.get(aPath)
+    aModelClass = entry.model if entry else None
+
+    if not aModelClass:
+        return JsonResponse({'error': 'Unknown model: ' + aPath}, status=404)
+
+    if field not in entry.fk_fields:
+        return JsonResponse({'error': 'Unknown FK field: ' + field}, status=404)
 
-    if aPath in settings.DYNAMIC_DATATB.keys():
-        aModelName  = settings.DYNAMIC_DATATB[aPath]
-        aModelClass = name_to_class(aModelName)
+    related = entry.fk_fields[field]
+    queryset = related.objects.order_by('pk')
+
+    q = request.GET.get('q', '').strip()
+    if q:
+        dynamic_q = Q()
+        for f in related._meta.fields:
+            if isinstance(f, models.CharField) and f.name not in FK_SKIP_FIELDS:
+                dynamic_q |= Q(**{f'{f.name}__istartswith': q})
+        if q.isdigit():
+            dynamic_q |= Q(pk=q)
+        queryset = queryset.filter(dynamic_q)
+
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+
+    start = (page - 1) * FK_PAGE_SIZE
+    rows = list(queryset[start:start + FK_PAGE_SIZE + 1])
+
+    return JsonResponse({
+        'results': [{'id': obj.pk, 'text': str(obj)} for obj in rows[:FK_PAGE_SIZE]],
+        'more': len(rows) > FK_PAGE_SIZE,
+    })
+
+
+@login_required(login_url='/accounts/login/')
+def create(request, aPath):
+    entry = registry.DATATB.get(aPath)
+    aModelClass = entry.model if entry else None
 
     if not aModelClass:
         return HttpResponse( ' > ERR: Getting ModelClass for path: ' + aPath )
 
     if request.method == 'POST':
         data = {}
-        fk_fields = get_model_fk(aModelClass)
+        fk_fields = entry.fk_fields
 
         for attribute, value in request.POST.items():
             if attribute == 'csrfmiddlewaretoken':
@@ -203,7 +337,7 @@ def create(request, aPath):
 
             # Process FKs    
             if attribute in fk_fields.keys():
-                value = name_to_class( fk_fields[attribute] ).objects.filter(id=value).first()
+                value = fk_fields[attribute].objects.filter(id=value).first()
             
             data[attribute] = value if value else ''
 
@@ -214,11 +348,8 @@ def create(request, aPath):
 
 @login_required(login_url='/accounts/login/')
 def delete(request, aPath, id):
-    aModelClass = None
-
-    if aPath in settings.DYNAMIC_DATATB.keys():
-        aModelName  = settings.DYNAMIC_DATATB[aPath]
-        aModelClass = name_to_class(aModelName)
+    entry = registry.DATATB.get(aPath)
+    aModelClass = entry.model if entry else None
 
     if not aModelClass:
         return HttpResponse( ' > ERR: Getting ModelClass for path: ' + aPath )
@@ -230,17 +361,14 @@ def delete(request, aPath, id):
 
 @login_required(login_url='/accounts/login/')
 def update(request, aPath, id):
-    aModelClass = None
-
-    if aPath in settings.DYNAMIC_DATATB.keys():
-        aModelName  = settings.DYNAMIC_DATATB[aPath]
-        aModelClass = name_to_class(aModelName)
+    entry = registry.DATATB.get(aPath)
+    aModelClass = entry.model if entry else None
 
     if not aModelClass:
         return HttpResponse( ' > ERR: Getting ModelClass for path: ' + aPath )
 
     item = aModelClass.objects.get(id=id)
-    fk_fields = get_model_fk(aModelClass)
+    fk_fields = entry.fk_fields
 
     if request.method == 'POST':
         for attribute, value in request.POST.items():
@@ -252,7 +380,7 @@ def update(request, aPath, id):
 
                 # Process FKs    
                 if attribute in fk_fields.keys():
-                    value = name_to_class( fk_fields[attribute] ).objects.filter(id=value).first()
+                    value = fk_fields[attribute].objects.filter(id=value).first()
 
                 setattr(item, attribute, value)
         
@@ -262,52 +390,311 @@ def update(request, aPath, id):
 
 
 
-# Export as CSV
+class BatchError(Exception):
+    pass
+
+
+def batch_values(aModelClass, row, fk_objects):
+    """One create/update row -> {attname: value}; FK ids are looked up in fk_objects (from in_bulk)."""
+    values = {}
+    for attribute, value in row.items():
+        if attribute in ('id', 'pk'):
+            continue
+
+        try:
+            field = aModelClass._meta.get_field(attribute)
+        except FieldDoesNotExist:
+            raise BatchError(f'unknown field {attribute}')
+        if not field.concrete or field.primary_key or field.many_to_many:
+            raise BatchError(f'{attribute} cannot be set')
+
+        if value in ('', None):
+            values[field.attname] = None if field.null else ''
+        elif attribute in fk_objects:
+            related = fk_objects[attribute].get(field.target_field.to_python(value))
+            if related is None:
+                raise BatchError(f'{attribute}: no {field.related_model.__name__} with id {value}')
+            values[field.attname] = related.pk
+        else:
+            values[field.attname] = field.to_python(value)
+    return values
+
+
+@login_required(login_url='/accounts/login/')
+def batch(request, aPath):
+    """
+    Many changes, one request, one transaction. POST a JSON body:
+    {"create": [{field: value}], "update": [{"id": 1, field: value}], "delete": [id, ...]}
+    Rows are written with bulk_create / bulk_update; FK ids are resolved
+    with one in_bulk query per FK field for the whole batch.
+    """
+    entry = registry.DATATB.get(aPath)
+    aModelClass = entry.model if entry else None
+
+    if not aModelClass:
+        return JsonResponse({'error': 'Unknown model: ' + aPath}, status=404)
+
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+
+    try:
+        data = json.loads(request.body)
+        creates = list(data.get('create') or [])
+        updates = list(data.get('update') or [])
+        deletes = list(data.get('delete') or [])
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Expected a JSON object with create / update / delete lists'}, status=400)
+
+    pk_field = aModelClass._meta.pk
+    fk_fields = entry.fk_fields
+
+    try:
+        for kind, rows in (('create', creates), ('update', updates)):
+            for i, row in enumerate(rows):
+                if not isinstance(row, dict):
+                    raise BatchError(f'{kind}[{i}]: expected object')
+
+        fk_objects = {}
+        for attribute in fk_fields:
+            field = aModelClass._meta.get_field(attribute)
+            ids = {field.target_field.to_python(row[attribute]) for row in creates + updates
+                   if row.get(attribute) not in ('', None)}
+            if ids:
+                fk_objects[attribute] = field.related_model.objects.in_bulk(ids)
+
+        with transaction.atomic():
+            created = []
+            for i, row in enumerate(creates):
+                try:
+                    created.append(aModelClass(**batch_values(aModelClass, row, fk_objects)))
+                except BatchError as e:
+                    raise BatchError(f'create[{i}]: {e}')
+            aModelClass.objects.bulk_create(created, batch_size=BATCH_SIZE)
+
+            items = aModelClass.objects.in_bulk([pk_field.to_python(row.get('id')) for row in updates])
+            changed = set()
+            for i, row in enumerate(updates):
+                item = items.get(pk_field.to_python(row.get('id')))
+                if item is None:
+                    raise BatchError(f'update[{i}]: no row with id {row.get("id")}')
+                try:
+                    values = batch_values(aModelClass, row, fk_objects)
+                except BatchError as e:
+                    raise BatchError(f'update[{i}]: {e}')
+                for attname, value in values.items():
+                    setattr(item, attname, value)
+                changed.update(values)
+            if changed:
+                aModelClass.objects.bulk_update(list(items.values()), list(changed), batch_size=BATCH_SIZE)
+
+            deleted = 0
+            if deletes:
+                deleted = aModelClass.objects.filter(pk__in=[pk_field.to_python(i) for i in deletes]).delete()[1] \
+                    .get(aModelClass._meta.label, 0)
+
+            # bulk writes skip the model signals that keep the search index and API versions in sync
+            search.index_objects(aModelClass, created + list(items.values()))
+            bulk_written.send(sender=aModelClass, objs=created + list(items.values()))
+
+    except ValidationError as e:
+        return JsonResponse({'error': '; '.join(e.messages), 'success': False}, status=400)
+    except (BatchError, IntegrityError, ValueError, TypeError) as e:
+        return JsonResponse({'error': str(e), 'success': False}, status=400)
+
+    return JsonResponse({
+        'created': len(created),
+        'updated': len(items),
+        'deleted': deleted,
+        'success': True,
+    })
+
+
+# Export as CSV / NDJSON / Parquet
+class Echo:
+    """File-like object whose write() hands the value back, for csv.writer in a generator."""
+    def write(self, value):
+        return value
+
+
+class ParquetSink:
+    """Write-only file for pyarrow's ParquetWriter; drain() returns what was written so far."""
+    closed = False
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+        self.position = 0
+
+    def write(self, data):
+        self.buffer.write(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+
+def export_chunks(queryset, fields):
+    """values_list rows in lists of EXPORT_CHUNK_SIZE; only one chunk is in memory at a time."""
+    relations = [(i, queryset.model._meta.get_field(f)) for i, f in enumerate(fields)]
+    relations = [(i, f) for i, f in relations if f.is_relation]
+    chunk = []
+    for row in queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) == EXPORT_CHUNK_SIZE:
+            yield related_display(chunk, relations)
+            chunk = []
+    if chunk:
+        yield related_display(chunk, relations)
+
+
+def related_display(chunk, relations):
+    """FK columns as str(related object), like the table shows them; one in_bulk() per FK and chunk."""
+    if not relations:
+        return chunk
+    rows = [list(row) for row in chunk]
+    for i, field in relations:
+        keys = {row[i] for row in rows if row[i] is not None}
+        objects = field.related_model._base_manager.in_bulk(keys, field_name=field.target_field.name)
+        for row in rows:
+            if row[i] is not None:
+                related = objects.get(row[i])
+                row[i] = str(related) if related is not None else str(row[i])  # dangling id
+    return rows
+
+
+def export_csv(queryset, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)  # Write the header
+    for chunk in export_chunks(queryset, fields):
+        yield ''.join(writer.writerow(row) for row in chunk)
+
+
+def export_ndjson(queryset, fields):
+    for chunk in export_chunks(queryset, fields):
+        yield ''.join(json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + '\n' for row in chunk)
+
+
+def parquet_type(field):
+    import pyarrow as pa
+
+    if field.is_relation:
+        return pa.string()  # exported as str(related), see related_display
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, (models.IntegerField, models.AutoField)):
+        return pa.int64()
+    if isinstance(field, models.FloatField):
+        return pa.float64()
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC' if settings.USE_TZ else None)
+    if isinstance(field, models.DateField):
+        return pa.date32()
+    return pa.string()  # Decimal, text, UUID, ...
+
+
+def export_parquet(queryset, fields, compression):
+    """One row group per chunk, written through pyarrow so the file is never held whole."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    model_fields = {f.name: f for f in queryset.model._meta.fields}
+    schema = pa.schema([(f, parquet_type(model_fields[f])) for f in fields])
+    text = [i for i, f in enumerate(fields) if schema.field(f).type == pa.string()]
+
+    sink = ParquetSink()
+    writer = pq.ParquetWriter(sink, schema, compression=compression)
+    for chunk in export_chunks(queryset, fields):
+        columns = [list(col) for col in zip(*chunk)]
+        for i in text:
+            columns[i] = [None if v is None else str(v) for v in columns[i]]
+        writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+EXPORT_FORMATS = {
+    # format -> (file extension, content type)
+    'csv'    : ('csv'    , 'text/csv'),
+    'ndjson' : ('ndjson' , 'application/x-ndjson'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+
 class ExportCSVView(View):
+    """
+    ?format=csv (default) / ndjson / parquet, ?gzip=1 to compress. Rows are
+    streamed from values_list(...).iterator(), so memory stays flat
+    whatever the table size.
+    """
     def get(self, request, aPath):
-        aModelName  = None
-        aModelClass = None
-
-        if aPath in settings.DYNAMIC_DATATB.keys():
-            aModelName  = settings.DYNAMIC_DATATB[aPath]
-            aModelClass = name_to_class(aModelName)
+        entry = registry.DATATB.get(aPath)
+        aModelClass = entry.model if entry else None
 
         if not aModelClass:
             return HttpResponse( ' > ERR: Getting ModelClass for path: ' + aPath )
-        
-        db_field_names = [field.name for field in aModelClass._meta.get_fields()]
-        fields = []
-        show_fields = HideShowFilter.objects.filter(value=False, parent=aPath.lower())
-        
-        for field in show_fields:
-            if field.key in db_field_names:
-                fields.append(field.key)
-            else:
-                print(f"Field {field.key} does not exist in {aModelClass} model.")
 
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="{aPath.lower()}.csv"'
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return HttpResponse( ' > ERR: Unknown export format: ' + export_format, status=400 )
+        compress = request.GET.get('gzip') in ('1', 'true')
 
-        writer = csv.writer(response)
-        writer.writerow(fields)  # Write the header
+        db_field_names = entry.db_fields
+        config = get_view_config(aPath, db_field_names)
+        fields = [key for key, field in config['hide_show'].items() if not field.value and key in db_field_names]
+        if not fields:
+            # values_list() with no names would export every column
+            return HttpResponse( ' > ERR: Every column is hidden, nothing to export', status=400 )
 
-        filter_string = {}
-        filter_instance = ModelFilter.objects.filter(parent=aPath.lower())
-        for filter_data in filter_instance:
-            filter_string[f'{filter_data.key}__icontains'] = filter_data.value
+        filter_string = config_filters(config, db_field_names)
 
         order_by = request.GET.get('order_by', 'id')
+        if order_by not in db_field_names:
+            order_by = 'id'
         queryset = aModelClass.objects.filter(**filter_string).order_by(order_by)
 
-        items = user_filter(request, queryset, db_field_names)
-
-        for item in items:
-            row_data = []
-            for field in fields:
-                try:
-                    row_data.append(getattr(item, field))
-                except AttributeError:
-                    row_data.append('') 
-            writer.writerow(row_data)
-
-        return response
\ No newline at end of file
+        items = user_filter(request, queryset, db_field_names, entry.fk_fields.keys())
+
+        extension, content_type = EXPORT_FORMATS[export_format]
+        if export_format == 'parquet':
+            try:
+                import pyarrow
+            except ImportError:
+                return HttpResponse( ' > ERR: Parquet export needs pyarrow', status=501 )
+            # Parquet compresses per column; gzip=1 picks its codec instead of wrapping the file
+            stream = export_parquet(items, fields, 'gzip' if compress else 'snappy')
+        elif export_format == 'ndjson':
+            stream = export_ndjson(items, fields)
+        else:
+            stream = export_csv(items, fields)
+
+        filename = f'{aPath.lower()}.{extension}'
+        if compress and export_format != 'parquet':
+            stream = gzip_stream(stream)
+            content_type = 'application/gzip'
+            filename += '.gz'
+
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
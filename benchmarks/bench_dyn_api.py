@@ -0,0 +1,92 @@
+"""
+Requests/sec on the dyn_api `product` endpoints, with and without the
+serializer class cache in apps.dyn_api.helpers.Utils (make_serializer).
+
+"uncached" reproduces the old behaviour: every request imports the model
+path again and defines (and DRF re-introspects) a brand-new serializer.
+Requests go through the full Django stack in-process (django.test.Client),
+so the numbers are comparable between modes, not absolute server figures.
+
+It runs against a throwaway test database (Django's test DB, migrated and
+seeded with BENCH_PRODUCTS products, 1500 by default), never db.sqlite3.
+
+Usage: [BENCH_PRODUCTS=n] python benchmarks/bench_dyn_api.py [seconds per run] [path ...]
+"""
+import os, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework import serializers
+
+from apps.dyn_api.helpers import Utils
+from apps.pages.models import Product
+
+DEFAULT_PATHS = ["/api/product/", "/api/product/1/", "/api/product/?fields=name,price"]
+PRODUCTS = int(os.environ.get("BENCH_PRODUCTS", 1500))
+
+
+def uncached_serializer(config, name, fields=None):
+    model = Utils.model_name_to_class(config[name])
+
+    class Serializer(serializers.ModelSerializer):
+        class Meta:
+            pass
+
+    Serializer.Meta.model = model
+    Serializer.Meta.fields = tuple(fields) if fields else '__all__'
+    return Serializer
+
+
+def run(client, path, seconds):
+    client.get(path)  # warm up
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        response = client.get(path)
+        assert response.status_code == 200, (path, response.status_code)
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def seed(count):
+    Product.objects.bulk_create(
+        [Product(name=f"Product {i}", info=f"bench item {i}", price=i % 500) for i in range(1, count + 1)],
+        batch_size=500,
+    )
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    paths = sys.argv[2:] or DEFAULT_PATHS
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        settings.DEBUG = False
+        seed(PRODUCTS)
+        client = Client()
+
+        cached = Utils.get_serializer
+        print(f"{PRODUCTS} products")
+        print(f"{'path':40} {'uncached':>10} {'cached':>10} {'speedup':>8}")
+        for path in paths:
+            Utils.get_serializer = staticmethod(uncached_serializer)
+            before = run(client, path, seconds)
+            Utils.get_serializer = cached
+            after = run(client, path, seconds)
+            print(f"{path:40} {before:10.1f} {after:10.1f} {after / before:7.2f}x")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == "__main__":
+    main()
@@ -93,14 +93,6 @@ def get_model_fk(aModelClass):
             retVal[ f.name ] = f_class
     return retVal        
 
-def get_model_fk_values(aModelClass):
-    retVal = {}
-    for f in aModelClass._meta.fields:
-        if type( f ) is django.db.models.fields.related.ForeignKey:
-            f_class = f.related_model.__module__ + '.' + f.related_model.__name__
-            retVal[ f.name ] = list( name_to_class( f_class ).objects.all() )
-    return retVal 
-
 # v = verbose
 def get_model_fields_v(aModelClass):
     retVal = {}
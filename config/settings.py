@@ -134,6 +134,33 @@ else:
         }
     }
 
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHE_BACKEND  = os.getenv('CACHE_BACKEND' , 'locmem')  # locmem / file / redis / memcached / dummy
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', None)
+
+CACHE_BACKENDS = {
+    'locmem'   : ('django.core.cache.backends.locmem.LocMemCache'       , 'trove'),
+    'file'     : ('django.core.cache.backends.filebased.FileBasedCache' , os.path.join(BASE_DIR, '.cache')),
+    'redis'    : ('django.core.cache.backends.redis.RedisCache'         , 'redis://127.0.0.1:6379'),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+    'dummy'    : ('django.core.cache.backends.dummy.DummyCache'         , ''),
+}
+
+CACHE_BACKEND_PATH, CACHE_DEFAULT_LOCATION = CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKENDS['locmem'])
+
+CACHES = {
+    'default': {
+        'BACKEND' : CACHE_BACKEND_PATH,
+        'LOCATION': CACHE_LOCATION or CACHE_DEFAULT_LOCATION,
+        'TIMEOUT' : int(os.getenv('CACHE_TIMEOUT', 300)),
+    }
+}
+
+# Card / deal fragments are keyed on the catalog version, so they can live long
+CATALOG_FRAGMENT_TIMEOUT = int(os.getenv('CATALOG_FRAGMENT_TIMEOUT', 60 * 60 * 24))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -191,6 +218,14 @@ DYNAMIC_DATATB = {
     # SLUG -> Import_PATH 
     'product'  : "apps.pages.models.Product",
 }
+
+# 'offset' (numbered pages) or 'keyset' (cursor pages, no COUNT per view); or a dict SLUG -> mode
+DYNAMIC_DATATB_PAGINATION = os.getenv('DYNAMIC_DATATB_PAGINATION', 'offset')
+
+# Slugs whose text columns get a search index (FTS5 on SQLite, pg_trgm on PostgreSQL)
+DYNAMIC_DATATB_SEARCH = (
+    # 'product',
+)
 ########################################
 
 # Syntax: URI -> Import_PATH
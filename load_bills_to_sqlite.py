@@ -1,6 +1,9 @@
-import json, sqlite3, sys, os, re
+import json, sqlite3, sys, os
 from datetime import date
 
+from load_perks_to_sqlite import ensure_catalog_version
+from wallet import anomalies, categorize, matching, search, simulator, welcome
+
 def ensure_schema(cur):
     cur.executescript("""
     PRAGMA foreign_keys = ON;
@@ -72,23 +75,15 @@ def ensure_schema(cur):
             except sqlite3.OperationalError:
                 pass
 
+    ensure_catalog_version(cur)
+    anomalies.ensure_schema(cur)
+    search.ensure_schema(cur)
+    categorize.ensure_schema(cur)
+    simulator.ensure_schema(cur)  # its triggers must see this load's upserts
+
 def _guess_issuer(name: str) -> str:
-    if not name: return ""
-    n = name.lower()
-    issuer_map = {
-        "american express": "American Express", "amex": "American Express",
-        "chase": "Chase", "jpmorgan": "Chase",
-        "bank of america": "Bank of America", "boa": "Bank of America",
-        "citi": "Citi", "citibank": "Citi",
-        "capital one": "Capital One", "cap one": "Capital One",
-        "wells fargo": "Wells Fargo", "discover": "Discover",
-        "barclay": "Barclays", "barclays": "Barclays",
-        "us bank": "U.S. Bank", "u.s. bank": "U.S. Bank",
-    }
-    for k, v in issuer_map.items():
-        if k in n: return v
-    m = re.split(r"\s*[-|–]\s*| card| credit", name, flags=re.I)
-    return (m[0] or "").strip()
+    # compiled alias matcher + LRU, see wallet/matching.py
+    return matching.guess_issuer(name or "")
 
 def _upsert_card_from_account(cur, a):
     """
@@ -189,6 +184,9 @@ def load(json_path, db_path):
     with open(json_path, "r", encoding="utf-8") as f:
         data = json.load(f)
 
+    # user + built-in categorization rules, compiled once per load
+    rules = categorize.RuleIndex.load(cur)
+
     # --- ACCOUNTS (upsert by PK only; account_id) ---
     accounts = data.get("accounts", [])
     for a in accounts:
@@ -230,15 +228,29 @@ def load(json_path, db_path):
 
         # categories for this tx (by (transaction_id, idx) only)
         cur.execute("DELETE FROM transaction_categories WHERE transaction_id = ?", (t.get("transaction_id"),))
-        for i, cat in enumerate(t.get("category", []) or []):
+        cur.execute("DELETE FROM transaction_category_rules WHERE transaction_id = ?", (t.get("transaction_id"),))
+        categories = t.get("category", []) or []
+        for i, cat in enumerate(categories):
             cur.execute("""
               INSERT OR IGNORE INTO transaction_categories (transaction_id, idx, category)
               VALUES (?, ?, ?)
             """, (t["transaction_id"], i, cat))
 
+        # no Plaid categories: first matching rule decides
+        if not categories:
+            categories = categorize.apply(cur, rules, t["transaction_id"], t.get("merchant_name"),
+                                          t.get("name"), float(t.get("amount", 0)))
+
+        # score against running per-merchant / per-category stats (once per transaction_id)
+        anomalies.observe(cur, t.get("transaction_id"), t.get("merchant_name") or t.get("name"),
+                          categories, float(t.get("amount", 0)), t.get("date"))
+
     # --- SEED tx if accounts imply flows; no account-id based skipping ---
     _seed_transactions_from_accounts(cur, accounts)
 
+    # --- anything stored earlier without categories (rules added since, older loads) ---
+    categorize.backfill(cur, rules)
+
     # --- ITEM / META (simple writes) ---
     item = data.get("item", {})
     if item and item.get("item_id"):
@@ -254,6 +266,10 @@ def load(json_path, db_path):
     cur.execute("INSERT INTO meta (request_id, total_transactions) VALUES (?, ?)",
                 (data.get("request_id"), data.get("total_transactions")))
 
+    # --- REWARDS / WELCOME BONUSES (advance from their checkpoints) ---
+    simulator.advance(cur)
+    welcome.advance(cur)
+
     conn.commit()
     conn.close()
 
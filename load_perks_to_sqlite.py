@@ -58,6 +58,39 @@ def ensure_schema(cur: sqlite3.Cursor):
     CREATE INDEX IF NOT EXISTS idx_bonus_categories_card ON bonus_categories(card_id);
     CREATE INDEX IF NOT EXISTS idx_perks_card ON perks(card_id);
     """)
+    ensure_catalog_version(cur)
+
+# Tables whose rows end up on the cards / deals pages. Any write bumps catalog_version,
+# which the views use to key their template fragment caches.
+CATALOG_TABLES = ("cards", "bonus_categories", "perks", "welcome_bonuses", "card_current_period")
+
+def ensure_catalog_version(cur: sqlite3.Cursor):
+    # execute(), not executescript(): the latter commits the loader's open transaction
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS catalog_version (
+      id         INTEGER PRIMARY KEY CHECK (id = 1),
+      version    INTEGER NOT NULL DEFAULT 0,
+      updated_at TEXT
+    )""")
+    cur.execute("INSERT OR IGNORE INTO catalog_version (id, version, updated_at) VALUES (1, 0, datetime('now'))")
+
+    bump = "UPDATE catalog_version SET version = version + 1, updated_at = datetime('now') WHERE id = 1;"
+    for table in CATALOG_TABLES:
+        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,))
+        if cur.fetchone() is None:
+            continue
+        for event in ("INSERT", "DELETE", "UPDATE"):
+            # The bills loader re-writes the same card values on every sync; only real changes count.
+            when = ""
+            if table == "cards" and event == "UPDATE":
+                when = """WHEN OLD.card_name IS NOT NEW.card_name OR OLD.issuer IS NOT NEW.issuer
+                        OR OLD.annual_fee IS NOT NEW.annual_fee OR OLD.type IS NOT NEW.type
+                        OR OLD.base_reward_rate IS NOT NEW.base_reward_rate"""
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_catalog_version
+                AFTER {event} ON {table} {when}
+                BEGIN {bump} END
+            """)
 
 def upsert_card(cur: sqlite3.Cursor, c: Dict[str, Any]) -> int:
     # Normalize
@@ -1,8 +1,10 @@
 from django.contrib import admin
-from .models import Card, Deal, Transaction, Goal, Subscription
+from .models import Card, Deal, Transaction, Goal, Subscription, RecurringSeries, CategoryRule
 
 admin.site.register(Card)
 admin.site.register(Deal)
 admin.site.register(Transaction)
 admin.site.register(Goal)
 admin.site.register(Subscription)
+admin.site.register(RecurringSeries)
+admin.site.register(CategoryRule)
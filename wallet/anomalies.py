@@ -0,0 +1,138 @@
+"""
+Streaming transaction anomaly detector.
+
+The bills loader calls observe() for every transaction it writes. Each new
+transaction is scored against compact running statistics (Welford's count,
+mean and M2) for its merchant and its category, then folded into them, so a
+sync costs a few primary-key lookups per transaction and never rescans
+history. Flags:
+
+* amount_outlier - more than Z_THRESHOLD standard deviations from the
+  merchant's mean (the category's while the merchant has too few charges)
+* new_merchant   - first charge from a merchant once the detector is warm
+* duplicate      - same merchant and amount as the previous charge, within
+  DUPLICATE_DAYS
+
+anomaly_scored remembers every transaction id already folded in, so the
+goals page's wipe-and-reload sync does not count anything twice.
+"""
+import math
+from datetime import date
+
+from .matching import normalize_merchant
+from .rewards import NON_SPEND
+
+Z_THRESHOLD = 3.0
+MIN_SAMPLES = 5        # charges needed before a mean/stddev is trusted
+WARMUP = 20            # transactions seen before first-seen merchants are flagged
+DUPLICATE_DAYS = 1
+MIN_STDDEV = 1.0       # dollars; keeps fixed-price merchants from flagging cents
+
+
+def ensure_schema(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS anomaly_stats (
+      scope               TEXT    NOT NULL,   -- 'merchant' / 'category' / 'all'
+      key                 TEXT    NOT NULL,
+      count               INTEGER NOT NULL DEFAULT 0,
+      mean                REAL    NOT NULL DEFAULT 0,
+      m2                  REAL    NOT NULL DEFAULT 0,
+      last_amount         REAL,
+      last_date           TEXT,
+      PRIMARY KEY (scope, key)
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS anomaly_scored (
+      transaction_id TEXT PRIMARY KEY
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS transaction_anomalies (
+      transaction_id TEXT NOT NULL,
+      kind           TEXT NOT NULL,
+      score          REAL,
+      detail         TEXT,
+      PRIMARY KEY (transaction_id, kind)
+    )
+    """)
+
+
+def _stats(cur, scope, key):
+    cur.execute("SELECT count, mean, m2, last_amount, last_date FROM anomaly_stats WHERE scope = ? AND key = ?",
+                (scope, key))
+    return cur.fetchone() or (0, 0.0, 0.0, None, None)
+
+
+def _fold(cur, scope, key, stats, amount, day):
+    count, mean, m2 = stats[:3]
+    count += 1
+    delta = amount - mean
+    mean += delta / count
+    m2 += delta * (amount - mean)
+    cur.execute("""
+        INSERT INTO anomaly_stats (scope, key, count, mean, m2, last_amount, last_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(scope, key) DO UPDATE SET
+          count = excluded.count, mean = excluded.mean, m2 = excluded.m2,
+          last_amount = excluded.last_amount, last_date = excluded.last_date
+    """, (scope, key, count, mean, m2, amount, day))
+
+
+def zscore(stats, amount):
+    """z of `amount` against (count, mean, m2); None while there are too few samples."""
+    count, mean, m2 = stats[:3]
+    if count < MIN_SAMPLES:
+        return None
+    std = max(math.sqrt(m2 / (count - 1)), MIN_STDDEV)
+    return (amount - mean) / std
+
+
+def observe(cur, transaction_id, merchant, categories, amount, day):
+    """
+    Score and fold one transaction. Returns the list of (kind, score, detail)
+    flags written; empty when nothing is unusual or the id was seen before.
+    """
+    cur.execute("INSERT OR IGNORE INTO anomaly_scored (transaction_id) VALUES (?)", (transaction_id,))
+    if not cur.rowcount:
+        return []
+
+    path = " / ".join(categories or [])
+    if amount is None or amount <= 0 or NON_SPEND.search(path):
+        return []
+
+    merchant_key = normalize_merchant(merchant)
+    category_key = (categories[-1] if categories else "").strip().lower()
+    day = str(day)
+
+    seen = _stats(cur, "all", "")
+    by_merchant = _stats(cur, "merchant", merchant_key) if merchant_key else None
+    by_category = _stats(cur, "category", category_key) if category_key else None
+
+    flags = []
+    if by_merchant is not None:
+        z, scope = zscore(by_merchant, amount), "merchant"
+        if z is None and by_category is not None:
+            z, scope = zscore(by_category, amount), "category"
+        if z is not None and abs(z) > Z_THRESHOLD:
+            flags.append(("amount_outlier", round(z, 2), f"{z:+.1f} sd from {scope} mean"))
+
+        if by_merchant[0] == 0 and seen[0] >= WARMUP:
+            flags.append(("new_merchant", 1.0, f"first charge from {merchant}"))
+
+        last_amount, last_date = by_merchant[3], by_merchant[4]
+        if (last_amount is not None and abs(last_amount - amount) < 0.01 and last_date
+                and abs((date.fromisoformat(day) - date.fromisoformat(last_date)).days) <= DUPLICATE_DAYS):
+            flags.append(("duplicate", 1.0, f"same amount as the charge on {last_date}"))
+
+    cur.executemany("""
+        INSERT OR REPLACE INTO transaction_anomalies (transaction_id, kind, score, detail)
+        VALUES (?, ?, ?, ?)
+    """, [(transaction_id, *f) for f in flags])
+
+    _fold(cur, "all", "", seen, amount, day)
+    if by_merchant is not None:
+        _fold(cur, "merchant", merchant_key, by_merchant, amount, day)
+    if by_category is not None:
+        _fold(cur, "category", category_key, by_category, amount, day)
+    return flags
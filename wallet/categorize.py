@@ -0,0 +1,130 @@
+"""
+Rule-based categorization for transactions Plaid left uncategorized.
+
+Rules match on the merchant / description text (a regex and/or a keyword
+list) and optionally on an amount range. User rules (the CategoryRule model,
+table wallet_categoryrule) come first by priority, then BUILTIN_RULES.
+
+Each rule's text pattern is compiled once. The rules that hit a given text
+are memoized per text (merchants repeat), so only the amount check runs per
+transaction, and the first of them in priority order whose amount range
+fits wins. The rule that fired is recorded in transaction_category_rules.
+"""
+import re
+from functools import lru_cache
+
+# name, merchant / description regex, keywords, min amount, max amount, category path.
+# Patterns are whole words (see builtin_pattern): "aldi" must not hit "Rinaldi".
+BUILTIN_RULES = [
+    ("food-delivery",   r"uber\s*eats|doordash|grubhub|postmates", "",  None, None, "Food and Drink / Delivery"),
+    ("coffee",          r"starbucks|dunkin|peet'?s|blue bottle",  "coffee, cafe, espresso", None, None, "Food and Drink / Coffee Shop"),
+    ("fast-food",       r"mcdonald'?s?|chipotle|taco bell|wendy'?s|burger king|subway", "", None, None, "Food and Drink / Fast Food"),
+    ("restaurants",     "", "restaurant, grill, bistro, diner, sushi, pizza", None, None, "Food and Drink / Restaurants"),
+    ("groceries",       r"whole\s*f(oo)?ds|trader joe'?s?|kroger|safeway|aldi|wegmans|instacart", "grocery, supermarket", None, None, "Shops / Groceries"),
+    ("gas",             r"shell|chevron|exxon(?:mobil)?|bp|sunoco|speedway", "fuel, gas station", None, None, "Travel / Gas Stations"),
+    ("rideshare",       r"uber|lyft", "taxi, cab", None, 200, "Travel / Taxi"),
+    ("airlines",        r"delta air(?:\s*lines)?|united airlines|american airlines|southwest|jetblue|alaska air", "airline, airfare", None, None, "Travel / Airlines"),
+    ("lodging",         r"marriott|hilton|hyatt|airbnb|ihg", "hotel, inn, resort", None, None, "Travel / Lodging"),
+    ("streaming",       r"netflix|spotify|hulu|disney\+|hbo|youtube premium|apple music", "", None, None, "Entertainment / Music"),
+    ("pharmacy",        r"cvs|walgreens|rite aid", "pharmacy", None, None, "Shops / Pharmacies"),
+    ("online-shopping", r"amazon|amzn|ebay|etsy", "", None, None, "Shops / Digital Purchase"),
+    ("utilities",       r"comcast|xfinity|verizon|at&t|t-mobile|con ed|pg&e", "electric, utility, internet, wireless", None, None, "Service / Utilities"),
+    ("atm",             "", "atm, cash withdrawal", None, None, "Transfer / Withdrawal"),
+    ("payroll",         "", "payroll, direct dep", None, 0, "Transfer / Payroll"),
+]
+
+
+def ensure_schema(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS transaction_category_rules (
+      transaction_id TEXT PRIMARY KEY,
+      rule           TEXT NOT NULL,
+      source         TEXT NOT NULL   -- 'user' / 'builtin'
+    )
+    """)
+
+
+def rule_pattern(pattern, keywords):
+    """One regex for a rule: its pattern, or any of its comma-separated keywords as whole words."""
+    parts = [pattern] if pattern else []
+    words = [w.strip() for w in (keywords or "").split(",") if w.strip()]
+    if words:
+        parts.append(r"\b(?:%s)\b" % "|".join(re.escape(w) for w in words))
+    return "|".join("(?:%s)" % p for p in parts)
+
+
+def builtin_pattern(pattern):
+    """A built-in pattern anchored on word edges (lookarounds, so names ending in "+" or "&t" still match)."""
+    return r"(?<!\w)(?:%s)(?!\w)" % pattern if pattern else ""
+
+
+class RuleIndex:
+    """Precompiled rule set; `match(merchant, name, amount)` -> (rule, source, categories) or None."""
+
+    def __init__(self, rules):
+        # rules: (name, source, pattern, keywords, min_amount, max_amount, category path), priority order
+        self.rules, self.patterns = [], []
+        for name, source, pattern, keywords, lo, hi, path in rules:
+            regex = rule_pattern(pattern, keywords)
+            try:
+                compiled = re.compile(regex, re.I) if regex else None
+            except re.error:
+                continue
+            self.rules.append((name, source, lo, hi, [c.strip() for c in path.split("/") if c.strip()]))
+            self.patterns.append(compiled)
+        self.candidates = lru_cache(maxsize=8192)(self._candidates)
+
+    @classmethod
+    def load(cls, cur):
+        return cls(user_rules(cur) + [(n, "builtin", builtin_pattern(p), *rest) for n, p, *rest in BUILTIN_RULES])
+
+    def _candidates(self, text):
+        """Every rule whose text pattern hits (or that has none), in priority order."""
+        return tuple(i for i, p in enumerate(self.patterns) if p is None or p.search(text))
+
+    def match(self, merchant, name, amount):
+        text = f"{merchant or ''} | {name or ''}"
+        for i in self.candidates(text):
+            rule, source, lo, hi, categories = self.rules[i]
+            if (lo is None or amount >= lo) and (hi is None or amount <= hi):
+                return rule, source, categories
+        return None
+
+
+def user_rules(cur):
+    """Active CategoryRule rows, when Django's tables exist in this DB."""
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='wallet_categoryrule'")
+    if cur.fetchone() is None:
+        return []
+    cur.execute("""
+        SELECT name, merchant_pattern, keywords, min_amount, max_amount, categories
+        FROM wallet_categoryrule
+        WHERE is_active
+        ORDER BY priority, id
+    """)
+    return [(name, "user", pattern, keywords, lo, hi, path) for name, pattern, keywords, lo, hi, path in cur.fetchall()]
+
+
+def apply(cur, index, transaction_id, merchant, name, amount):
+    """Categorize one transaction; writes its transaction_categories rows. Returns the categories."""
+    hit = index.match(merchant, name, amount)
+    if hit is None:
+        return []
+    rule, source, categories = hit
+    cur.executemany("""
+        INSERT OR IGNORE INTO transaction_categories (transaction_id, idx, category)
+        VALUES (?, ?, ?)
+    """, [(transaction_id, i, c) for i, c in enumerate(categories)])
+    cur.execute("INSERT OR REPLACE INTO transaction_category_rules (transaction_id, rule, source) VALUES (?, ?, ?)",
+                (transaction_id, rule, source))
+    return categories
+
+
+def backfill(cur, index):
+    """Categorize every stored transaction that still has no categories. Returns how many were categorized."""
+    cur.execute("""
+        SELECT t.transaction_id, t.merchant_name, t.name, t.amount
+        FROM transactions t
+        WHERE NOT EXISTS (SELECT 1 FROM transaction_categories c WHERE c.transaction_id = t.transaction_id)
+    """)
+    return sum(1 for row in cur.fetchall() if apply(cur, index, *row))
@@ -0,0 +1,96 @@
+"""
+End-of-period spend forecasts for goals.
+
+One pass over the transaction history builds a transactions x goals match
+matrix (category and period window), and every goal's current spend,
+run-rate and seasonal baseline fall out of column sums:
+
+* run-rate: spend so far / days elapsed in the period
+* seasonal: spend in the same window one year earlier / period length
+
+The projected end-of-period spend is spend so far plus the remaining days
+at the blended daily rate (the run-rate alone when there is no history a
+year back). Results are cached until the next ingest (see versions).
+"""
+from datetime import date
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
+
+from . import rewards, versions
+
+CACHE_PREFIX = "wallet:goal_forecast"
+
+# The key already changes with every ingest and every day; this only bounds stale entries
+CACHE_TIMEOUT = 60 * 60 * 24
+
+SEASON = np.timedelta64(365, "D")
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def forecast(goals, transactions, today):
+    """
+    goals: dicts with category, limit_amount, period_start, period_end.
+    Returns one dict per goal: current_spend, projected, projected_pct, overrun.
+    """
+    if not goals:
+        return []
+
+    starts = np.array([_as_date(g["period_start"]) for g in goals], dtype="datetime64[D]")
+    ends   = np.array([_as_date(g["period_end"]) for g in goals], dtype="datetime64[D]")
+    limits = np.array([float(g["limit_amount"] or 0) for g in goals])
+    today  = np.datetime64(today, "D")
+
+    # Category match per distinct category path, then gathered per transaction
+    paths = {}
+    inverse = np.fromiter((paths.setdefault(p.lower(), len(paths)) for p in transactions["categories"]),
+                          dtype=np.intp, count=len(transactions["categories"]))
+    needles = [(g["category"] or "").lower() for g in goals]
+    matches = np.array([[n in p for n in needles] for p in paths], dtype=bool).reshape(-1, len(goals))[inverse]
+
+    dates   = transactions["dates"][:, None]
+    amounts = transactions["amounts"]
+
+    in_period = matches & (dates >= starts) & (dates <= ends)
+    in_season = matches & (dates >= starts - SEASON) & (dates <= ends - SEASON)
+
+    spent    = amounts @ in_period
+    seasonal = amounts @ in_season
+
+    length    = (ends - starts).astype(int) + 1
+    elapsed   = np.clip((today - starts).astype(int) + 1, 0, length)
+    remaining = length - elapsed
+
+    run_rate = np.divide(spent, elapsed, out=np.zeros_like(spent), where=elapsed > 0)
+    baseline = seasonal / np.maximum(length, 1)
+    daily    = np.where(in_season.any(axis=0), (run_rate + baseline) / 2, run_rate)
+
+    projected = spent + daily * remaining
+    projected_pct = np.divide(projected * 100, limits, out=np.zeros_like(projected), where=limits > 0)
+
+    return [{
+        "current_spend": float(spent[i]),
+        "projected"    : round(float(projected[i]), 2),
+        "projected_pct": float(projected_pct[i]),
+        "overrun"      : round(float(max(projected[i] - limits[i], 0)), 2) if limits[i] else 0.0,
+    } for i in range(len(goals))]
+
+
+def goal_forecasts(goals, user_id=versions.GOALS_USER_ID, today=None):
+    """forecast() for the user's goals, cached until the next ingest, goal or category rule change."""
+    today = today or date.today()
+    key = "%s:%s" % (CACHE_PREFIX, versions._digest(
+        user_id, today, versions.sources_state(), versions.meta_state(), versions.goals_state(user_id),
+        versions.rules_state(),
+    ))
+    result = cache.get(key)
+    if result is None:
+        with connection.cursor() as cur:
+            transactions = rewards.load_transactions(cur)
+        result = forecast(goals, transactions, today)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
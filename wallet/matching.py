@@ -0,0 +1,68 @@
+"""
+Compiled issuer / merchant matchers.
+
+Each alias table is compiled once into a single alternation regex (longest
+alias first), so a lookup is one scan of the name instead of one `in` test
+per alias. Results are memoized: accounts and merchants repeat on every
+load, and a repeat costs a dict lookup.
+"""
+import re
+from functools import lru_cache
+
+ISSUER_ALIASES = {
+    "american express": "American Express", "amex": "American Express",
+    "chase": "Chase", "jpmorgan": "Chase",
+    "bank of america": "Bank of America", "boa": "Bank of America",
+    "citi": "Citi", "citibank": "Citi",
+    "capital one": "Capital One", "cap one": "Capital One",
+    "wells fargo": "Wells Fargo", "discover": "Discover",
+    "barclay": "Barclays", "barclays": "Barclays",
+    "us bank": "U.S. Bank", "u.s. bank": "U.S. Bank",
+}
+
+# Normalized merchant aliases -> canonical merchant key
+MERCHANT_ALIASES = {
+    "amzn mktp": "amazon", "amzn": "amazon", "amazon marketplace": "amazon",
+    "wholefds": "whole foods market", "whole foods": "whole foods market",
+    "uber trip": "uber", "uber eats": "uber eats",
+    "sbux": "starbucks",
+    "netflix": "netflix", "spotify": "spotify",
+}
+
+CACHE_SIZE = 4096
+
+
+def compile_aliases(aliases, whole_words=False):
+    """One case-insensitive alternation over the keys, longest first so 'citibank' beats 'citi'."""
+    keys = sorted(aliases, key=len, reverse=True)
+    pattern = "|".join(re.escape(k) for k in keys)
+    if whole_words:
+        pattern = r"\b(?:%s)\b" % pattern
+    return re.compile(pattern, re.I)
+
+
+_ISSUER_RE = compile_aliases(ISSUER_ALIASES)
+_ISSUER_SPLIT = re.compile(r"\s*[-|–]\s*| card| credit", re.I)
+
+# Issuer names are matched anywhere ('Barclaycard'); merchant aliases only as whole words ('sbux', not 'sbuxton')
+_MERCHANT_RE = compile_aliases(MERCHANT_ALIASES, whole_words=True)
+_MERCHANT_NOISE = re.compile(r"[*#].*$|\b(?:inc|llc|ltd|co|corp|com)\b|[^a-z ]+")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def guess_issuer(name):
+    """Issuer from an account / card name; falls back to the text before ' - ', ' card', ' credit'."""
+    if not name:
+        return ""
+    m = _ISSUER_RE.search(name)
+    if m:
+        return ISSUER_ALIASES[m.group(0).lower()]
+    return (_ISSUER_SPLIT.split(name)[0] or "").strip()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_merchant(name):
+    """'SPOTIFY USA*AB12' -> 'spotify', 'AMZN Mktp US' -> 'amazon', 'Gym Co, Inc.' -> 'gym'."""
+    key = " ".join(_MERCHANT_NOISE.sub(" ", (name or "").lower()).split())
+    m = _MERCHANT_RE.search(key)
+    return MERCHANT_ALIASES[m.group(0)] if m else key
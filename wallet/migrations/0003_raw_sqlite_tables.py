@@ -0,0 +1,115 @@
+# Generated by Django 4.2.9 on 2026-10-19 16:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0002_account'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BonusCategory',
+            fields=[
+                ('id', models.IntegerField(db_column='rowid', primary_key=True, serialize=False)),
+                ('idx', models.IntegerField()),
+                ('category_name', models.CharField(max_length=255)),
+                ('reward_rate', models.FloatField(blank=True, null=True)),
+                ('cap', models.FloatField(blank=True, null=True)),
+                ('note', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'bonus_categories',
+                'ordering': ('card_id', 'idx'),
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CatalogCard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('card_name', models.CharField(max_length=255)),
+                ('issuer', models.CharField(blank=True, max_length=255, null=True)),
+                ('annual_fee', models.FloatField(blank=True, null=True)),
+                ('type', models.CharField(blank=True, max_length=100, null=True)),
+                ('base_reward_rate', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'cards',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Perk',
+            fields=[
+                ('id', models.IntegerField(db_column='rowid', primary_key=True, serialize=False)),
+                ('idx', models.IntegerField()),
+                ('perk_name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('frequency', models.CharField(blank=True, max_length=100, null=True)),
+            ],
+            options={
+                'db_table': 'perks',
+                'ordering': ('card_id', 'idx'),
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PlaidTransaction',
+            fields=[
+                ('transaction_id', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('amount', models.FloatField()),
+                ('date', models.DateField()),
+                ('name', models.CharField(blank=True, max_length=255, null=True)),
+                ('merchant_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('payment_channel', models.CharField(blank=True, max_length=50, null=True)),
+            ],
+            options={
+                'db_table': 'transactions',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TransactionCategory',
+            fields=[
+                ('id', models.IntegerField(db_column='rowid', primary_key=True, serialize=False)),
+                ('idx', models.IntegerField()),
+                ('category', models.CharField(max_length=255)),
+            ],
+            options={
+                'db_table': 'transaction_categories',
+                'ordering': ('transaction_id', 'idx'),
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CardCurrentPeriod',
+            fields=[
+                ('card', models.OneToOneField(on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='current_period', serialize=False, to='wallet.catalogcard')),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'card_current_period',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='WelcomeBonus',
+            fields=[
+                ('card', models.OneToOneField(on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='welcome_bonus', serialize=False, to='wallet.catalogcard')),
+                ('points', models.IntegerField(blank=True, null=True)),
+                ('cash_back', models.FloatField(blank=True, null=True)),
+                ('points_or_cash', models.FloatField(blank=True, null=True)),
+                ('spend_requirement', models.FloatField(blank=True, null=True)),
+                ('time_frame_months', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'welcome_bonuses',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.9 on 2026-10-19 16:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0004_catalog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestMeta',
+            fields=[
+                ('id', models.IntegerField(db_column='rowid', primary_key=True, serialize=False)),
+                ('request_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('total_transactions', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'meta',
+                'managed': False,
+            },
+        ),
+    ]
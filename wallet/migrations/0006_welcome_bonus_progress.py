@@ -0,0 +1,30 @@
+# Generated by Django 4.2.9 on 2026-10-19 16:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0005_ingest_meta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WelcomeBonusProgress',
+            fields=[
+                ('card', models.OneToOneField(on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='bonus_progress', serialize=False, to='wallet.catalogcard')),
+                ('spend_requirement', models.FloatField(blank=True, null=True)),
+                ('time_frame_months', models.IntegerField(blank=True, null=True)),
+                ('window_start', models.DateField(blank=True, null=True)),
+                ('window_end', models.DateField(blank=True, null=True)),
+                ('spend', models.FloatField(default=0)),
+                ('met_on', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'welcome_bonus_progress',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.9 on 2026-10-19 16:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('wallet', '0006_welcome_bonus_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringCheckpoint',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recurring_checkpoint', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('last_transaction_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('seen', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RecurringSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('merchant_key', models.CharField(db_index=True, max_length=200)),
+                ('merchant', models.CharField(max_length=200)),
+                ('amount', models.FloatField()),
+                ('last_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('occurrences', models.IntegerField(default=1)),
+                ('first_date', models.DateField()),
+                ('last_date', models.DateField()),
+                ('weekly_hits', models.IntegerField(default=0)),
+                ('monthly_hits', models.IntegerField(default=0)),
+                ('yearly_hits', models.IntegerField(default=0)),
+                ('subscription', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='series', to='wallet.subscription')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_series', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.9 on 2026-10-19 16:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0007_recurring_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionAnomaly',
+            fields=[
+                ('id', models.IntegerField(db_column='rowid', primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=50)),
+                ('score', models.FloatField(blank=True, null=True)),
+                ('detail', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'transaction_anomalies',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.9 on 2026-10-19 16:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0008_transaction_anomalies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('merchant_pattern', models.CharField(blank=True, default='', max_length=255)),
+                ('keywords', models.CharField(blank=True, default='', max_length=255)),
+                ('min_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('categories', models.CharField(max_length=255)),
+                ('priority', models.IntegerField(default=100)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ('priority', 'id'),
+            },
+        ),
+    ]
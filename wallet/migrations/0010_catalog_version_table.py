@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def create_catalog_version(apps, schema_editor):
+    # Same table the perk loader creates (load_perks_to_sqlite.ensure_catalog_version), so the
+    # version exists, and the views can bump it, before that loader has ever run on this DB.
+    with schema_editor.connection.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS catalog_version (
+              id         INTEGER PRIMARY KEY CHECK (id = 1),
+              version    INTEGER NOT NULL DEFAULT 0,
+              updated_at TEXT
+            )
+        """)
+        cur.execute("SELECT 1 FROM catalog_version WHERE id = 1")
+        if cur.fetchone() is None:
+            cur.execute("INSERT INTO catalog_version (id, version, updated_at) VALUES (1, 0, NULL)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0009_category_rule'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_catalog_version, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,11 @@
-from django.db import models
+import re
+
+from django.core.exceptions import ValidationError
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, DatabaseError
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 class Card(models.Model):
@@ -65,15 +71,319 @@ class Subscription(models.Model):
     def __str__(self):
         return f"{self.merchant} - {self.amount}/{self.billing_cycle}"
 
+class CategoryRule(models.Model):
+    # User categorization rules; the bills loader applies them (before the built-in ones, see
+    # wallet/categorize.py) to transactions that arrive without Plaid categories.
+    name = models.CharField(max_length=100)
+    merchant_pattern = models.CharField(max_length=255, blank=True, default="")  # regex on merchant / description
+    keywords = models.CharField(max_length=255, blank=True, default="")  # comma-separated whole words
+    min_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    categories = models.CharField(max_length=255)  # e.g. "Food and Drink / Coffee Shop"
+    priority = models.IntegerField(default=100)  # lower runs first
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ("priority", "id")
+
+    def clean(self):
+        if not self.merchant_pattern and not self.keywords and self.min_amount is None and self.max_amount is None:
+            raise ValidationError("A rule needs a merchant pattern, keywords or an amount range.")
+        try:
+            re.compile(self.merchant_pattern or "")
+        except re.error as e:
+            raise ValidationError({"merchant_pattern": f"Invalid regular expression: {e}"})
+
+    def __str__(self):
+        return f"{self.name} -> {self.categories}"
+
+
+class RecurringSeries(models.Model):
+    # Running state of one merchant / amount-band series, advanced by wallet/subscriptions.py
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="recurring_series")
+    merchant_key = models.CharField(max_length=200, db_index=True)  # normalized merchant
+    merchant = models.CharField(max_length=200)
+    amount = models.FloatField()  # running mean of the charges in the series
+    last_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    occurrences = models.IntegerField(default=1)
+    first_date = models.DateField()
+    last_date = models.DateField()
+    weekly_hits = models.IntegerField(default=0)  # gaps between charges that fit each cycle
+    monthly_hits = models.IntegerField(default=0)
+    yearly_hits = models.IntegerField(default=0)
+    subscription = models.OneToOneField(
+        Subscription, on_delete=models.SET_NULL, null=True, blank=True, related_name="series",
+    )
+
+    def __str__(self):
+        return f"{self.merchant} ~${self.amount:.2f} x{self.occurrences}"
+
+
+class RecurringCheckpoint(models.Model):
+    # Last transaction folded into the user's series, and how many were seen up to it
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="recurring_checkpoint")
+    last_date = models.DateField(null=True, blank=True)
+    last_transaction_id = models.CharField(max_length=255, null=True, blank=True)
+    seen = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.last_date} / {self.last_transaction_id}"
+
+
 class Account(models.Model):
     # These fields must match the column names in your 'accounts' table.
+    account_id = models.CharField(max_length=255, primary_key=True)
+    mask = models.CharField(max_length=20, null=True, blank=True)
+    name = models.CharField(max_length=255, null=True, blank=True)
     official_name = models.CharField(max_length=255)
     subtype = models.CharField(max_length=100)
-    # Add any other columns you might want to access from the table.
+    type = models.CharField(max_length=50, null=True, blank=True)
 
     class Meta:
         managed = False  # Tells Django not to manage this table's schema (e.g., migrations)
         db_table = 'accounts' # The exact name of your existing table in the database
 
     def __str__(self):
-        return self.official_name
\ No newline at end of file
+        return self.official_name or self.name or self.account_id
+
+
+# --- Raw SQLite tables written by load_perks_to_sqlite.py / load_bills_to_sqlite.py ---
+# The loaders own the schema, so every model below is unmanaged. Tables keyed by
+# (card_id, idx) or (transaction_id, idx) have no single-column key; they are
+# mapped on SQLite's implicit rowid, which the loaders rewrite on every reload.
+
+class CatalogCardQuerySet(models.QuerySet):
+    def with_details(self):
+        """Cards with bonus categories, perks, welcome bonus and period in 3 queries."""
+        return (
+            self.select_related("welcome_bonus", "current_period")
+                .prefetch_related("bonus_categories", "perks")
+                .order_by("issuer", "card_name")
+        )
+
+    def cached_details(self, version):
+        """with_details() as a list, kept in the cache until the catalog version changes."""
+        key = f"wallet:catalog_cards:{version}"
+        cards = cache.get(key)
+        if cards is None:
+            cards = list(self.with_details())
+            cache.set(key, cards, settings.CATALOG_FRAGMENT_TIMEOUT)
+        return cards
+
+
+class CatalogCard(models.Model):
+    card_name = models.CharField(max_length=255)
+    issuer = models.CharField(max_length=255, null=True, blank=True)
+    annual_fee = models.FloatField(null=True, blank=True)
+    type = models.CharField(max_length=100, null=True, blank=True)
+    base_reward_rate = models.FloatField(null=True, blank=True)
+    account = models.ForeignKey(
+        Account, on_delete=models.DO_NOTHING, null=True, blank=True,
+        db_column="plaid_account_id", related_name="cards",
+    )
+
+    objects = CatalogCardQuerySet.as_manager()
+
+    class Meta:
+        managed = False
+        db_table = "cards"
+
+    def __str__(self):
+        return f"{self.card_name} ({self.issuer})"
+
+
+class CatalogVersion(models.Model):
+    # Single row (created by migration 0010), bumped by triggers on every catalog table
+    # (see load_perks_to_sqlite.py) and by the views that edit cards (bump())
+    version = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        managed = False
+        db_table = "catalog_version"
+
+    @classmethod
+    def current(cls):
+        """Current catalog version, 0 when the perk loader has never run on this DB."""
+        try:
+            return cls.objects.values_list("version", flat=True).first() or 0
+        except DatabaseError:
+            return 0
+
+    @classmethod
+    def bump(cls):
+        """New catalog version, for writes that may run before the loader's triggers exist."""
+        cls.objects.filter(id=1).update(version=models.F("version") + 1, updated_at=timezone.now())
+
+    def __str__(self):
+        return f"catalog v{self.version}"
+
+
+class IngestMeta(models.Model):
+    # Single row rewritten by load_bills_to_sqlite.py on every load
+    id = models.IntegerField(primary_key=True, db_column="rowid")
+    request_id = models.CharField(max_length=255, null=True, blank=True)
+    total_transactions = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        managed = False
+        db_table = "meta"
+
+    def __str__(self):
+        return f"{self.request_id} ({self.total_transactions} tx)"
+
+
+class BonusCategory(models.Model):
+    id = models.IntegerField(primary_key=True, db_column="rowid")
+    card = models.ForeignKey(CatalogCard, on_delete=models.DO_NOTHING, related_name="bonus_categories")
+    idx = models.IntegerField()
+    category_name = models.CharField(max_length=255)
+    reward_rate = models.FloatField(null=True, blank=True)
+    cap = models.FloatField(null=True, blank=True)
+    note = models.TextField(null=True, blank=True)
+
+    class Meta:
+        managed = False
+        db_table = "bonus_categories"
+        ordering = ("card_id", "idx")
+
+    def __str__(self):
+        return f"{self.category_name} ({self.reward_rate}x)"
+
+
+class Perk(models.Model):
+    id = models.IntegerField(primary_key=True, db_column="rowid")
+    card = models.ForeignKey(CatalogCard, on_delete=models.DO_NOTHING, related_name="perks")
+    idx = models.IntegerField()
+    perk_name = models.CharField(max_length=255)
+    description = models.TextField(null=True, blank=True)
+    frequency = models.CharField(max_length=100, null=True, blank=True)
+
+    class Meta:
+        managed = False
+        db_table = "perks"
+        ordering = ("card_id", "idx")
+
+    def __str__(self):
+        return self.perk_name
+
+
+class WelcomeBonus(models.Model):
+    card = models.OneToOneField(
+        CatalogCard, on_delete=models.DO_NOTHING, primary_key=True, related_name="welcome_bonus",
+    )
+    points = models.IntegerField(null=True, blank=True)
+    cash_back = models.FloatField(null=True, blank=True)
+    points_or_cash = models.FloatField(null=True, blank=True)
+    spend_requirement = models.FloatField(null=True, blank=True)
+    time_frame_months = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        managed = False
+        db_table = "welcome_bonuses"
+
+    def __str__(self):
+        return f"Welcome bonus for card {self.card_id}"
+
+
+class CardCurrentPeriod(models.Model):
+    card = models.OneToOneField(
+        CatalogCard, on_delete=models.DO_NOTHING, primary_key=True, related_name="current_period",
+    )
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        managed = False
+        db_table = "card_current_period"
+
+    def __str__(self):
+        return f"{self.start_date} -> {self.end_date}"
+
+
+class WelcomeBonusProgress(models.Model):
+    # One row per linked card, maintained incrementally by wallet/welcome.py
+    card = models.OneToOneField(
+        CatalogCard, on_delete=models.DO_NOTHING, primary_key=True, related_name="bonus_progress",
+    )
+    spend_requirement = models.FloatField(null=True, blank=True)
+    time_frame_months = models.IntegerField(null=True, blank=True)
+    window_start = models.DateField(null=True, blank=True)
+    window_end = models.DateField(null=True, blank=True)
+    spend = models.FloatField(default=0)
+    met_on = models.DateField(null=True, blank=True)
+
+    class Meta:
+        managed = False
+        db_table = "welcome_bonus_progress"
+
+    @property
+    def pct(self):
+        if not self.spend_requirement:
+            return 0
+        return min(self.spend / self.spend_requirement * 100, 100)
+
+    def __str__(self):
+        return f"${self.spend} / ${self.spend_requirement} for card {self.card_id}"
+
+
+class PlaidTransaction(models.Model):
+    transaction_id = models.CharField(max_length=255, primary_key=True)
+    account = models.ForeignKey(Account, on_delete=models.DO_NOTHING, related_name="transactions")
+    amount = models.FloatField()
+    date = models.DateField()
+    name = models.CharField(max_length=255, null=True, blank=True)
+    merchant_name = models.CharField(max_length=255, null=True, blank=True)
+    payment_channel = models.CharField(max_length=50, null=True, blank=True)
+
+    class Meta:
+        managed = False
+        db_table = "transactions"
+
+    @property
+    def merchant(self):
+        return self.merchant_name or self.name or "Unknown"
+
+    @property
+    def category_path(self):
+        # Uses the prefetch cache when the queryset was built with prefetch_related("categories")
+        return " / ".join(c.category for c in self.categories.all())
+
+    @property
+    def anomaly_summary(self):
+        # Uses the prefetch cache when the queryset was built with prefetch_related("anomalies")
+        return "; ".join(a.detail or a.kind for a in self.anomalies.all())
+
+    def __str__(self):
+        return f"{self.merchant} - ${self.amount} on {self.date}"
+
+
+class TransactionCategory(models.Model):
+    id = models.IntegerField(primary_key=True, db_column="rowid")
+    transaction = models.ForeignKey(PlaidTransaction, on_delete=models.DO_NOTHING, related_name="categories")
+    idx = models.IntegerField()
+    category = models.CharField(max_length=255)
+
+    class Meta:
+        managed = False
+        db_table = "transaction_categories"
+        ordering = ("transaction_id", "idx")
+
+    def __str__(self):
+        return self.category
+
+
+class TransactionAnomaly(models.Model):
+    # Written by wallet/anomalies.py as the bills loader ingests transactions
+    id = models.IntegerField(primary_key=True, db_column="rowid")
+    transaction = models.ForeignKey(PlaidTransaction, on_delete=models.DO_NOTHING, related_name="anomalies")
+    kind = models.CharField(max_length=50)
+    score = models.FloatField(null=True, blank=True)
+    detail = models.TextField(null=True, blank=True)
+
+    class Meta:
+        managed = False
+        db_table = "transaction_anomalies"
+
+    def __str__(self):
+        return f"{self.kind} on {self.transaction_id}"
@@ -0,0 +1,247 @@
+"""
+Best-card reward optimizer.
+
+Every transaction and every bonus category is classified once into reward
+classes (dining, groceries, gas, ...). The earn rate of every wallet card on
+every transaction is then a NumPy rate matrix, so picking the best card and
+pricing the rewards missed by the card actually used are array reductions
+instead of a Python loop over transactions x cards.
+
+The loaders only take a DB-API cursor (Django's or sqlite3's), so the same
+code serves the views and the standalone ingest scripts.
+"""
+import re
+
+import numpy as np
+
+# Cards without a base rate still earn the usual 1x
+DEFAULT_BASE_RATE = 1.0
+
+# Reward class -> keywords, matched at word starts against category names
+REWARD_CLASSES = {
+    "dining"       : r"restaurant|dining|food and drink|fast food|coffee|cafe",
+    "groceries"    : r"supermarket|grocer|instacart",
+    "gas"          : r"gas|fuel|service station",
+    "ev_charging"  : r"ev charging|electric vehicle",
+    "travel"       : r"travel|airline|flight|hotel|lodging|car rental|cruise|aviation",
+    "transit"      : r"transit|rideshare|taxi|parking|toll",
+    "streaming"    : r"streaming|music|video",
+    "entertainment": r"entertainment|concert|theat|movie|ticket",
+    "drugstores"   : r"drugstore|pharmac",
+    "home"         : r"home improvement|furniture|hardware",
+}
+
+CLASS_NAMES    = tuple(REWARD_CLASSES)
+CLASS_PATTERNS = tuple(re.compile(r"\b(?:%s)" % kw, re.I) for kw in REWARD_CLASSES.values())
+
+# Money movement that no card earns on
+NON_SPEND = re.compile(r"\b(?:transfer|payment|deposit|payroll|loan|retirement|hsa|interest|credit card)", re.I)
+
+TRANSACTIONS_SQL = """
+    SELECT t.transaction_id, t.account_id, t.date, t.amount,
+           COALESCE(t.merchant_name, t.name, ''),
+           COALESCE((SELECT GROUP_CONCAT(c.category, ' / ')
+                     FROM transaction_categories c
+                     WHERE c.transaction_id = t.transaction_id), '')
+    FROM transactions t
+    {where}
+    ORDER BY t.date, t.transaction_id
+"""
+
+
+def classify(text):
+    """Boolean vector over CLASS_NAMES for a free-text label."""
+    return np.array([bool(p.search(text or "")) for p in CLASS_PATTERNS], dtype=bool)
+
+
+def classify_transaction(category_path, merchant):
+    """
+    Classes of one transaction. The most specific category wins
+    ("Travel / Gas Stations" is gas, not travel); the full path is only
+    used when the leaf says nothing ("Food and Drink / Delivery").
+    """
+    leaf = category_path.rsplit(" / ", 1)[-1]
+    classes = classify(f"{leaf} {merchant}")
+    if not classes.any():
+        classes = classify(f"{category_path} {merchant}")
+    return classes
+
+
+def load_wallet(cur):
+    """
+    Cards with their base rates and bonus categories, as arrays:
+    card ids / names / base rates / linked account / current period, and one
+    row per bonus category with the owning card's column, its rate, cap and
+    classes.
+    """
+    cur.execute("SELECT id, card_name, base_reward_rate, plaid_account_id FROM cards ORDER BY id")
+    cards = cur.fetchall()
+    column = {card_id: i for i, (card_id, *_rest) in enumerate(cards)}
+
+    cur.execute("SELECT card_id, category_name, reward_rate, idx, cap FROM bonus_categories ORDER BY card_id, idx")
+    bonuses = [b for b in cur.fetchall() if b[0] in column and b[2] is not None]
+
+    cur.execute("SELECT card_id, start_date, end_date FROM card_current_period")
+    periods = {column[p[0]]: (p[1], p[2]) for p in cur.fetchall() if p[0] in column and p[1] and p[2]}
+
+    return {
+        "card_ids"     : np.array([c[0] for c in cards], dtype=np.int64),
+        "card_names"   : [c[1] for c in cards],
+        "base_rates"   : np.array([DEFAULT_BASE_RATE if c[2] is None else c[2] for c in cards], dtype=np.float64),
+        "accounts"     : {c[3]: i for i, c in enumerate(cards) if c[3]},
+        "periods"      : periods,
+        "bonus_card"   : np.array([column[b[0]] for b in bonuses], dtype=np.intp),
+        "bonus_idx"    : [b[3] for b in bonuses],
+        "bonus_names"  : [b[1] for b in bonuses],
+        "bonus_rates"  : np.array([b[2] for b in bonuses], dtype=np.float64),
+        "bonus_caps"   : [b[4] for b in bonuses],
+        "bonus_classes": np.array([classify(b[1]) for b in bonuses], dtype=bool).reshape(-1, len(CLASS_NAMES)),
+    }
+
+
+def load_transactions(cur, where="", params=()):
+    """
+    Transactions in date order: ids, account ids, dates, amounts, merchants,
+    category paths. `where` filters on `t`, in the cursor's paramstyle.
+    """
+    cur.execute(TRANSACTIONS_SQL.format(where=where), params)
+    rows = cur.fetchall()
+    return {
+        "ids"       : [r[0] for r in rows],
+        "accounts"  : [r[1] for r in rows],
+        "dates"     : np.array([r[2] for r in rows], dtype="datetime64[D]"),
+        "amounts"   : np.array([r[3] or 0 for r in rows], dtype=np.float64),
+        "merchants" : [r[4] for r in rows],
+        "categories": [r[5] for r in rows],
+    }
+
+
+def rate_matrix(classes, eligible, wallet):
+    """
+    Earn rate (x per dollar) of every card on every row of `classes`.
+
+    classes:  (n, k) bool, reward classes per row
+    eligible: (n,) bool, False rows (payments, transfers) earn nothing
+    returns:  (n, cards) float
+    """
+    n, m = classes.shape[0], wallet["base_rates"].shape[0]
+    rates = np.broadcast_to(wallet["base_rates"], (n, m)).copy()
+
+    if wallet["bonus_rates"].size and n:
+        hits  = (classes.astype(np.uint8) @ wallet["bonus_classes"].T.astype(np.uint8)) > 0
+        bonus = np.where(hits, wallet["bonus_rates"], 0.0)
+
+        # Best bonus per card: bonus columns are grouped by card, reduce each group
+        owner  = wallet["bonus_card"]
+        order  = np.argsort(owner, kind="stable")
+        owner  = owner[order]
+        starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+        cols   = owner[starts]
+        rates[:, cols] = np.maximum(rates[:, cols], np.maximum.reduceat(bonus[:, order], starts, axis=1))
+
+    rates[~eligible] = 0.0
+    return rates
+
+
+def classify_rows(transactions):
+    """
+    Classes and eligibility per transaction. Classification runs once per
+    distinct (category path, merchant) pair; `inverse` maps transactions back.
+    """
+    keys = list(zip(transactions["categories"], transactions["merchants"]))
+    uniq = {}
+    inverse = np.fromiter((uniq.setdefault(k, len(uniq)) for k in keys), dtype=np.intp, count=len(keys))
+
+    classes  = np.array([classify_transaction(path, merchant) for path, merchant in uniq], dtype=bool)
+    classes  = classes.reshape(-1, len(CLASS_NAMES))
+    eligible = np.array([not NON_SPEND.search(path) for path, _ in uniq], dtype=bool)
+    return classes, eligible, inverse
+
+
+def optimize(transactions, wallet):
+    """
+    Best card and missed rewards per transaction.
+
+    Rewards are in dollars (1x = 1% back). Transactions on accounts without a
+    linked card earn nothing as used. Bonus caps are not applied here;
+    see wallet.simulator for the cap-aware ledger.
+    """
+    n = len(transactions["ids"])
+    used = np.fromiter((wallet["accounts"].get(a, -1) for a in transactions["accounts"]), dtype=np.intp, count=n)
+
+    if not wallet["card_ids"].size:
+        zeros = np.zeros(n)
+        return {"best": np.full(n, -1, dtype=np.intp), "used": used,
+                "best_rate": zeros, "used_rate": zeros,
+                "best_reward": zeros, "used_reward": zeros, "missed": zeros}
+
+    classes, eligible, inverse = classify_rows(transactions)
+    rates = rate_matrix(classes, eligible, wallet)[inverse]      # transactions x cards
+    spend = np.clip(transactions["amounts"], 0, None)
+
+    best      = rates.argmax(axis=1)
+    best_rate = rates[np.arange(n), best]
+    best      = np.where(best_rate > 0, best, -1)
+    used_rate = np.where(used >= 0, rates[np.arange(n), np.maximum(used, 0)], 0.0)
+
+    best_reward = spend * best_rate / 100
+    used_reward = spend * used_rate / 100
+    return {
+        "best"       : best,
+        "used"       : used,
+        "best_rate"  : best_rate,
+        "used_rate"  : used_rate,
+        "best_reward": best_reward,
+        "used_reward": used_reward,
+        "missed"     : best_reward - used_reward,
+    }
+
+
+def summarize(transactions, wallet, result, top=10):
+    """JSON-friendly totals, per-card totals and the top missed transactions."""
+    names  = wallet["card_names"]
+    missed = result["missed"]
+
+    def card(i):
+        return {"id": int(wallet["card_ids"][i]), "name": names[i]} if i >= 0 else None
+
+    per_card = []
+    earning = result["best"] >= 0
+    if names and earning.any():
+        best    = result["best"][earning]
+        counts  = np.bincount(best, minlength=len(names))
+        rewards = np.bincount(best, weights=result["best_reward"][earning], minlength=len(names))
+        for i in np.flatnonzero(counts):
+            per_card.append({**card(i), "transactions": int(counts[i]), "rewards": round(float(rewards[i]), 2)})
+        per_card.sort(key=lambda c: -c["rewards"])
+
+    worst = np.argsort(-missed, kind="stable")[:top]
+    return {
+        "transactions"   : len(transactions["ids"]),
+        "best_rewards"   : round(float(result["best_reward"].sum()), 2),
+        "actual_rewards" : round(float(result["used_reward"].sum()), 2),
+        "missed_rewards" : round(float(missed.sum()), 2),
+        "best_cards"     : per_card,
+        "top_missed"     : [{
+            "transaction_id": transactions["ids"][i],
+            "merchant"      : transactions["merchants"][i],
+            "category"      : transactions["categories"][i],
+            "amount"        : float(transactions["amounts"][i]),
+            "used_card"     : card(result["used"][i]),
+            "best_card"     : card(result["best"][i]),
+            "missed"        : round(float(missed[i]), 2),
+        } for i in worst if missed[i] > 0],
+    }
+
+
+def empty_report():
+    """report() before any transactions were loaded."""
+    return {"transactions": 0, "best_rewards": 0.0, "actual_rewards": 0.0, "missed_rewards": 0.0,
+            "best_cards": [], "top_missed": []}
+
+
+def report(cur, top=10):
+    """Load the wallet and transaction history from `cur` and summarize."""
+    wallet = load_wallet(cur)
+    transactions = load_transactions(cur)
+    return summarize(transactions, wallet, optimize(transactions, wallet), top=top)
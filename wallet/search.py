@@ -0,0 +1,96 @@
+"""
+Full-text search over transactions (SQLite FTS5).
+
+transactions_fts shares its rowid with transactions and indexes name,
+merchant_name and the category path. Triggers on transactions and
+transaction_categories keep it in sync with every loader write, so the
+search endpoint is a single ranked MATCH on the index.
+"""
+import re
+import sqlite3
+
+FTS_TABLE = "transactions_fts"
+
+# bm25 weights per column: transaction_id (unindexed), name, merchant_name, categories
+RANK = f"bm25({FTS_TABLE}, 0.0, 1.0, 2.0, 0.5)"
+
+SEARCH_SQL = f"""
+    SELECT t.transaction_id, t.date, t.amount, t.name, t.merchant_name, f.categories, {RANK} AS rank
+    FROM {FTS_TABLE} f
+    JOIN transactions t ON t.rowid = f.rowid
+    WHERE {FTS_TABLE} MATCH %s
+    ORDER BY rank
+    LIMIT %s
+"""
+
+_CATEGORIES = """(SELECT COALESCE(GROUP_CONCAT(category, ' '), '')
+                  FROM transaction_categories WHERE transaction_id = {tx})"""
+
+
+def ensure_schema(cur):
+    """
+    Create the index and its triggers; backfill it when it is new. Does
+    nothing when this SQLite build has no FTS5.
+    """
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (FTS_TABLE,))
+    created = cur.fetchone() is None
+    try:
+        cur.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+              transaction_id UNINDEXED, name, merchant_name, categories,
+              tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """)
+    except sqlite3.OperationalError:
+        return False
+
+    for trigger in (
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_insert_fts AFTER INSERT ON transactions BEGIN
+          INSERT INTO {FTS_TABLE} (rowid, transaction_id, name, merchant_name, categories)
+          VALUES (new.rowid, new.transaction_id, new.name, new.merchant_name, {_CATEGORIES.format(tx="new.transaction_id")});
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_update_fts AFTER UPDATE ON transactions BEGIN
+          UPDATE {FTS_TABLE}
+             SET transaction_id = new.transaction_id, name = new.name, merchant_name = new.merchant_name
+           WHERE rowid = old.rowid;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_delete_fts AFTER DELETE ON transactions BEGIN
+          DELETE FROM {FTS_TABLE} WHERE rowid = old.rowid;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transaction_categories_insert_fts AFTER INSERT ON transaction_categories BEGIN
+          UPDATE {FTS_TABLE} SET categories = {_CATEGORIES.format(tx="new.transaction_id")}
+           WHERE rowid = (SELECT rowid FROM transactions WHERE transaction_id = new.transaction_id);
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transaction_categories_delete_fts AFTER DELETE ON transaction_categories BEGIN
+          UPDATE {FTS_TABLE} SET categories = {_CATEGORIES.format(tx="old.transaction_id")}
+           WHERE rowid = (SELECT rowid FROM transactions WHERE transaction_id = old.transaction_id);
+        END;
+        """,
+    ):
+        cur.execute(trigger)
+
+    if created:
+        cur.execute(f"""
+            INSERT INTO {FTS_TABLE} (rowid, transaction_id, name, merchant_name, categories)
+            SELECT t.rowid, t.transaction_id, t.name, t.merchant_name, {_CATEGORIES.format(tx="t.transaction_id")}
+            FROM transactions t
+        """)
+    return True
+
+
+def match_query(text):
+    """
+    User text -> FTS5 query: every word must match, as a prefix.
+    Quoting each word keeps FTS syntax (AND, NEAR, quotes, ...) out of it.
+    """
+    words = re.findall(r"\w+", text or "")
+    return " ".join('"%s"*' % w for w in words)
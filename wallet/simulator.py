@@ -0,0 +1,256 @@
+"""
+Cap-aware reward simulator.
+
+Walks transactions in (date, transaction_id) order and credits each one to
+the card it was charged on: matching bonus categories earn their rate until
+their cap for the period is spent, the rest earns base_reward_rate.
+
+* Cards with a card_current_period rotate their categories: bonuses only
+  apply inside that window and all of them share one cap.
+* Other capped bonuses reset every calendar year.
+
+State (cap usage, per-transaction ledger, checkpoint) lives next to the raw
+tables, so each run only advances from the last checkpoint. A catalog change
+(rates, caps, periods, cards), a card linked to another account, or a
+transaction added, removed or changed behind the checkpoint replays history
+from scratch.
+"""
+import json
+
+import numpy as np
+
+from . import rewards
+
+ROTATING_BUCKET = -1
+
+
+CHECKPOINT_COLUMNS = ("id", "last_date", "last_transaction_id", "catalog_version", "accounts", "seen", "stale")
+
+
+def ensure_schema(cur):
+    cur.execute("PRAGMA table_info(reward_checkpoint)")
+    columns = tuple(row[1] for row in cur.fetchall())
+    if columns and columns != CHECKPOINT_COLUMNS:
+        # Checkpoint from an older version: drop it, the next run replays from scratch
+        cur.execute("DROP TABLE reward_checkpoint")
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS reward_checkpoint (
+      id                  INTEGER PRIMARY KEY CHECK (id = 1),
+      last_date           TEXT,
+      last_transaction_id TEXT,
+      catalog_version     INTEGER,
+      accounts            TEXT,                         -- card -> account links the ledger was credited with
+      seen                INTEGER NOT NULL DEFAULT 0,   -- transactions up to the checkpoint
+      stale               INTEGER NOT NULL DEFAULT 0    -- set by the triggers below
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS reward_cap_usage (
+      card_id INTEGER NOT NULL,
+      period  TEXT    NOT NULL,
+      bucket  INTEGER NOT NULL,   -- bonus_categories.idx, or -1 for a rotating card's shared cap
+      spent   REAL    NOT NULL DEFAULT 0,
+      PRIMARY KEY (card_id, period, bucket)
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS reward_ledger (
+      transaction_id TEXT PRIMARY KEY,
+      card_id        INTEGER,            -- NULL: not on a card, or not eligible spend
+      date           TEXT    NOT NULL,
+      bonus_spend    REAL    NOT NULL,
+      base_spend     REAL    NOT NULL,
+      reward         REAL    NOT NULL
+    )
+    """)
+
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='transactions'")
+    if cur.fetchone() is None:
+        return
+    # A credited transaction that changes (the loader upserts every row on each sync, so only
+    # real changes count) or moves behind the checkpoint invalidates the ledger.
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_update_rewards
+    AFTER UPDATE OF account_id, amount, date ON transactions
+    WHEN OLD.account_id IS NOT NEW.account_id OR OLD.amount IS NOT NEW.amount OR OLD.date IS NOT NEW.date
+    BEGIN
+      UPDATE reward_checkpoint SET stale = 1
+      WHERE (OLD.date, OLD.transaction_id) <= (last_date, last_transaction_id)
+         OR (NEW.date, NEW.transaction_id) <= (last_date, last_transaction_id);
+    END
+    """)
+
+
+def _catalog_version(cur):
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='catalog_version'")
+    if cur.fetchone() is None:
+        return 0
+    cur.execute("SELECT version FROM catalog_version WHERE id = 1")
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def _has_catalog(cur):
+    cur.execute("""
+        SELECT COUNT(*) FROM sqlite_master
+        WHERE type='table' AND name IN ('cards', 'bonus_categories', 'card_current_period', 'transactions')
+    """)
+    return cur.fetchone()[0] == 4
+
+
+def _bucket(wallet, card, bonus, date):
+    """(period, bucket) a bonus draws its cap from on `date`; None when the bonus does not apply."""
+    window = wallet["periods"].get(card)
+    if window:
+        start, end = window
+        if not (start <= date <= end):
+            return None
+        return start, ROTATING_BUCKET
+    return date[:4], wallet["bonus_idx"][bonus]
+
+
+def _account_links(cur):
+    cur.execute("SELECT id, plaid_account_id FROM cards ORDER BY id")
+    return json.dumps(cur.fetchall())
+
+
+def _seen_through(cur, last_date, last_id):
+    cur.execute("SELECT COUNT(*) FROM transactions WHERE (date, transaction_id) <= (?, ?)", (last_date, last_id))
+    return cur.fetchone()[0]
+
+
+def advance(cur):
+    """
+    Credit every transaction after the checkpoint. Returns the number of
+    transactions processed. The caller commits.
+    """
+    if not _has_catalog(cur):
+        return 0
+    ensure_schema(cur)
+
+    version, accounts = _catalog_version(cur), _account_links(cur)
+    cur.execute("""
+        SELECT last_date, last_transaction_id, catalog_version, accounts, seen, stale
+        FROM reward_checkpoint WHERE id = 1
+    """)
+    checkpoint = cur.fetchone()
+    # A transaction loaded late (an older statement) or deleted changes the count behind the checkpoint
+    if (checkpoint is None or checkpoint[2:4] != (version, accounts) or checkpoint[5]
+            or (checkpoint[0] is not None and _seen_through(cur, *checkpoint[:2]) != checkpoint[4])):
+        cur.execute("DELETE FROM reward_cap_usage")
+        cur.execute("DELETE FROM reward_ledger")
+        checkpoint = None
+    seen = checkpoint[4] if checkpoint else 0
+
+    if checkpoint and checkpoint[0] is not None:
+        batch = rewards.load_transactions(cur, "WHERE (t.date, t.transaction_id) > (?, ?)", checkpoint[:2])
+    else:
+        batch = rewards.load_transactions(cur)
+
+    if batch["ids"]:
+        wallet = rewards.load_wallet(cur)
+        _credit(cur, batch, wallet)
+        last_date, last_id = str(batch["dates"][-1]), batch["ids"][-1]
+    elif checkpoint:
+        last_date, last_id = checkpoint[:2]
+    else:
+        last_date = last_id = None
+
+    cur.execute("""
+        INSERT INTO reward_checkpoint (id, last_date, last_transaction_id, catalog_version, accounts, seen, stale)
+        VALUES (1, ?, ?, ?, ?, ?, 0)
+        ON CONFLICT(id) DO UPDATE SET
+          last_date           = excluded.last_date,
+          last_transaction_id = excluded.last_transaction_id,
+          catalog_version     = excluded.catalog_version,
+          accounts            = excluded.accounts,
+          seen                = excluded.seen,
+          stale               = 0
+    """, (last_date, last_id, version, accounts, seen + len(batch["ids"])))
+    return len(batch["ids"])
+
+
+def _credit(cur, batch, wallet):
+    classes, eligible, inverse = rewards.classify_rows(batch)
+    if wallet["bonus_rates"].size and len(classes):
+        hits = (classes.astype(np.uint8) @ wallet["bonus_classes"].T.astype(np.uint8)) > 0
+    else:
+        hits = np.zeros((len(classes), wallet["bonus_rates"].size), dtype=bool)
+
+    # Highest rate first, so a purchase fills the best bonus before falling through
+    by_card = {}
+    for b in np.argsort(-wallet["bonus_rates"], kind="stable"):
+        by_card.setdefault(int(wallet["bonus_card"][b]), []).append(int(b))
+
+    cur.execute("SELECT card_id, period, bucket, spent FROM reward_cap_usage")
+    usage = {(r[0], r[1], r[2]): r[3] for r in cur.fetchall()}
+    touched = set()
+    ledger = []
+
+    for i, tx_id in enumerate(batch["ids"]):
+        card = wallet["accounts"].get(batch["accounts"][i])
+        amount = float(batch["amounts"][i])
+        u = inverse[i]
+        date = str(batch["dates"][i])
+        if card is None or amount <= 0 or not eligible[u]:
+            ledger.append((tx_id, None, date, 0.0, 0.0, 0.0))
+            continue
+
+        card_id = int(wallet["card_ids"][card])
+        remaining, reward, bonus_spend = amount, 0.0, 0.0
+
+        for b in by_card.get(card, ()):
+            if remaining <= 0:
+                break
+            if not hits[u, b]:
+                continue
+            bucket = _bucket(wallet, card, b, date)
+            if bucket is None:
+                continue
+            cap = wallet["bonus_caps"][b]
+            if cap is None:
+                take = remaining
+            else:
+                key = (card_id, *bucket)
+                take = min(remaining, max(cap - usage.get(key, 0.0), 0.0))
+                usage[key] = usage.get(key, 0.0) + take
+                touched.add(key)
+            reward += take * wallet["bonus_rates"][b] / 100
+            bonus_spend += take
+            remaining -= take
+
+        reward += remaining * wallet["base_rates"][card] / 100
+        ledger.append((tx_id, card_id, date, round(bonus_spend, 2), round(remaining, 2), round(reward, 4)))
+
+    cur.executemany("""
+        INSERT INTO reward_cap_usage (card_id, period, bucket, spent) VALUES (?, ?, ?, ?)
+        ON CONFLICT(card_id, period, bucket) DO UPDATE SET spent = excluded.spent
+    """, [(*key, usage[key]) for key in touched])
+    cur.executemany("""
+        INSERT OR REPLACE INTO reward_ledger (transaction_id, card_id, date, bonus_spend, base_spend, reward)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, ledger)
+
+
+def cap_usage(cur):
+    """Spend drawn against each capped bonus, latest period first."""
+    cur.execute("""
+        SELECT u.card_id, c.card_name, u.period, u.bucket, u.spent,
+               COALESCE(MAX(b.cap), 0)
+        FROM reward_cap_usage u
+        JOIN cards c ON c.id = u.card_id
+        LEFT JOIN bonus_categories b
+          ON b.card_id = u.card_id AND (u.bucket = -1 OR b.idx = u.bucket)
+        GROUP BY u.card_id, u.period, u.bucket
+        ORDER BY u.period DESC, c.card_name
+    """)
+    return [{
+        "card_id": r[0], "card_name": r[1], "period": r[2],
+        "bucket": None if r[3] == ROTATING_BUCKET else r[3],
+        "spent": round(r[4], 2), "cap": r[5],
+    } for r in cur.fetchall()]
+
+
+def earned(cur):
+    cur.execute("SELECT COALESCE(SUM(reward), 0) FROM reward_ledger")
+    return round(cur.fetchone()[0], 2)
@@ -0,0 +1,189 @@
+"""
+Recurring-charge detection.
+
+Transactions are streamed once in (date, transaction_id) order. Each charge
+joins the series with the same normalized merchant whose running mean is
+within AMOUNT_BAND of it, and the gap since that series' previous charge is
+counted against the weekly / monthly / yearly windows. A series whose gaps
+mostly fit one cycle becomes a Subscription with its next payment date.
+
+Series state and a checkpoint are stored per user and only cover that
+user's accounts, so a re-run after a sync only streams their new
+transactions. A transaction arriving behind the checkpoint rebuilds the
+user's series from scratch. Detection runs on the sync path (see
+views.spending_dashboard); the subscriptions page only reads.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from . import rewards, versions
+from .matching import normalize_merchant
+from .models import RecurringCheckpoint, RecurringSeries, Subscription
+from .welcome import add_months
+
+# Relative distance from a series' mean amount that still counts as the same charge
+AMOUNT_BAND = 0.10
+
+# cycle -> (min gap days, max gap days, min charges)
+CYCLES = {
+    "weekly" : (6, 8, 3),
+    "monthly": (26, 35, 3),
+    "yearly" : (355, 375, 2),
+}
+
+# Share of gaps that must fit the winning cycle
+MIN_FIT = 0.6
+
+def next_payment(cycle, last):
+    if cycle == "weekly":
+        return last + timedelta(days=7)
+    return add_months(last, 1 if cycle == "monthly" else 12)
+
+
+def classify(series):
+    """Billing cycle of a series, or None when it is not (yet) recurring."""
+    gaps = series.occurrences - 1
+    if gaps <= 0:
+        return None
+    cycle = max(CYCLES, key=lambda c: getattr(series, f"{c}_hits"))
+    hits = getattr(series, f"{cycle}_hits")
+    if series.occurrences < CYCLES[cycle][2] or hits < MIN_FIT * gaps:
+        return None
+    return cycle
+
+
+def _fold(series, day, amount):
+    gap = (day - series.last_date).days
+    if gap <= 0:
+        return  # same-day duplicate, not a new billing period
+    for cycle, (lo, hi, _) in CYCLES.items():
+        if lo <= gap <= hi:
+            setattr(series, f"{cycle}_hits", getattr(series, f"{cycle}_hits") + 1)
+    series.occurrences += 1
+    series.amount += (amount - series.amount) / series.occurrences
+    series.last_amount = Decimal(str(round(amount, 2)))
+    series.last_date = day
+
+
+def user_accounts(cur, user_id):
+    """
+    Account ids whose transactions belong to the user. The synced Plaid item
+    has no owner column; its accounts are the user the goals page syncs for.
+    """
+    if user_id != versions.GOALS_USER_ID:
+        return []
+    cur.execute("SELECT account_id FROM accounts ORDER BY account_id")
+    return [r[0] for r in cur.fetchall()]
+
+
+def _in_accounts(accounts):
+    return "t.account_id IN (%s)" % ", ".join(["%s"] * len(accounts))
+
+
+def _seen_through(cur, accounts, checkpoint):
+    cur.execute(
+        f"SELECT COUNT(*) FROM transactions t WHERE {_in_accounts(accounts)} AND (t.date, t.transaction_id) <= (%s, %s)",
+        [*accounts, checkpoint.last_date.isoformat(), checkpoint.last_transaction_id],
+    )
+    return cur.fetchone()[0]
+
+
+def _reset(user_id, checkpoint):
+    Subscription.objects.filter(user_id=user_id, series__isnull=False).delete()
+    RecurringSeries.objects.filter(user_id=user_id).delete()
+    checkpoint.last_date = checkpoint.last_transaction_id = None
+    checkpoint.seen = 0
+
+
+@transaction.atomic
+def detect(user_id, today=None):
+    """
+    Advance the user's series with transactions after the checkpoint and
+    sync their Subscription rows. Returns the number of transactions read.
+    """
+    today = today or date.today()
+    checkpoint, _ = RecurringCheckpoint.objects.select_for_update().get_or_create(user_id=user_id)
+
+    with connection.cursor() as cur:
+        accounts = user_accounts(cur, user_id)
+        # An account added or dropped also changes the count behind the checkpoint
+        if checkpoint.last_date and (not accounts or _seen_through(cur, accounts, checkpoint) != checkpoint.seen):
+            _reset(user_id, checkpoint)
+
+        if not accounts:
+            batch = {"ids": []}
+        elif checkpoint.last_date:
+            batch = rewards.load_transactions(
+                cur, f"WHERE {_in_accounts(accounts)} AND (t.date, t.transaction_id) > (%s, %s)",
+                [*accounts, checkpoint.last_date.isoformat(), checkpoint.last_transaction_id],
+            )
+        else:
+            batch = rewards.load_transactions(cur, f"WHERE {_in_accounts(accounts)}", accounts)
+
+    series = list(RecurringSeries.objects.filter(user_id=user_id).select_related("subscription"))
+    by_merchant = {}
+    for s in series:
+        by_merchant.setdefault(s.merchant_key, []).append(s)
+
+    dirty = set()
+    if batch["ids"]:
+        _, eligible, inverse = rewards.classify_rows(batch)
+        for i, merchant in enumerate(batch["merchants"]):
+            amount = float(batch["amounts"][i])
+            key = normalize_merchant(merchant)
+            if amount <= 0 or not key or not eligible[inverse[i]]:
+                continue
+            day = batch["dates"][i].item()
+
+            candidates = [s for s in by_merchant.get(key, ()) if abs(amount - s.amount) <= AMOUNT_BAND * s.amount]
+            if candidates:
+                s = min(candidates, key=lambda s: abs(amount - s.amount))
+                _fold(s, day, amount)
+            else:
+                s = RecurringSeries(
+                    user_id=user_id, merchant_key=key, merchant=merchant, amount=amount,
+                    last_amount=Decimal(str(round(amount, 2))), first_date=day, last_date=day,
+                )
+                by_merchant.setdefault(key, []).append(s)
+                series.append(s)
+            dirty.add(id(s))
+
+        checkpoint.seen += len(batch["ids"])
+        checkpoint.last_date = batch["dates"][-1].item()
+        checkpoint.last_transaction_id = batch["ids"][-1]
+
+    for s in series:
+        relinked = _sync_subscription(s, today)
+        if relinked or id(s) in dirty:
+            s.save()
+    checkpoint.save()
+    return len(batch["ids"])
+
+
+def _sync_subscription(s, today):
+    """Create, update or drop the series' Subscription. True when the series' link changed."""
+    cycle = classify(s)
+    due = next_payment(cycle, s.last_date) if cycle else None
+
+    # Lapsed: a full extra cycle went by without a charge
+    if due and next_payment(cycle, due) < today:
+        cycle = due = None
+
+    sub = s.subscription
+    if cycle is None:
+        if sub is None:
+            return False
+        s.subscription = None
+        sub.delete()
+        return True
+
+    relinked = sub is None
+    if relinked:
+        sub = Subscription(user_id=s.user_id)
+    if relinked or (sub.merchant, sub.amount, sub.billing_cycle, sub.next_payment_date) != (s.merchant, s.last_amount, cycle, due):
+        sub.merchant, sub.amount, sub.billing_cycle, sub.next_payment_date = s.merchant, s.last_amount, cycle, due
+        sub.save()
+    s.subscription = sub
+    return relinked
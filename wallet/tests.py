@@ -1,3 +1,596 @@
-from django.test import TestCase
+import math
+import sqlite3
+from datetime import date
 
-# Create your tests here.
+import numpy as np
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, SimpleTestCase, RequestFactory
+
+import load_bills_to_sqlite
+import load_perks_to_sqlite
+
+from . import anomalies, categorize, forecast, matching, rewards, search, simulator, subscriptions, versions, views, welcome
+from .models import CategoryRule, CatalogVersion, RecurringCheckpoint, RecurringSeries, Subscription
+
+
+def builtin_index(*user_rules):
+    return categorize.RuleIndex(list(user_rules) + [
+        (name, "builtin", categorize.builtin_pattern(pattern), *rest)
+        for name, pattern, *rest in categorize.BUILTIN_RULES
+    ])
+
+
+class CategorizeTests(SimpleTestCase):
+
+    def test_user_rule_beats_overlapping_builtin(self):
+        index = builtin_index(("my-eats", "user", "eats", "", None, None, "Food / Mine"))
+        self.assertEqual(index.match("UBER EATS", "", 20), ("my-eats", "user", ["Food", "Mine"]))
+
+    def test_priority_order_not_text_position(self):
+        index = categorize.RuleIndex([
+            ("late", "user", "coffee", "", None, None, "A"),
+            ("early", "user", "blue", "", None, None, "B"),
+        ])
+        self.assertEqual(index.match("Blue Bottle Coffee", "", 5)[0], "late")
+
+    def test_amount_range_falls_through_to_next_rule(self):
+        index = categorize.RuleIndex([
+            ("big", "user", "uber", "", 500, None, "Big"),
+            ("any", "user", "uber", "", None, None, "Any"),
+        ])
+        self.assertEqual(index.match("UBER TRIP", "", 20)[0], "any")
+        self.assertEqual(index.match("UBER TRIP", "", 900)[0], "big")
+
+    def test_builtins_match_whole_words(self):
+        index = builtin_index()
+        for merchant in ("Hubert Bakery", "Delta Dental", "Rinaldi Market"):
+            self.assertIsNone(index.match(merchant, "", 20), merchant)
+        self.assertEqual(index.match("UBER EATS", "", 20)[0], "food-delivery")
+        self.assertEqual(index.match("UBER *TRIP", "", 20)[0], "rideshare")
+        self.assertEqual(index.match("DELTA AIR LINES", "", 300)[0], "airlines")
+        self.assertEqual(index.match("Disney+", "", 8)[0], "streaming")
+
+
+class MatchingTests(SimpleTestCase):
+
+    def test_merchant_aliases(self):
+        for name, key in [("AMZN Mktp US*2K4", "amazon"), ("Amazon Marketplace", "amazon"), ("SBUX #1234", "starbucks"),
+                          ("WHOLEFDS MKT 10", "whole foods market"), ("Uber Eats", "uber eats"),
+                          ("Spotify USA*AB12", "spotify"), ("Gym Co, Inc.", "gym")]:
+            self.assertEqual(matching.normalize_merchant(name), key, name)
+
+    def test_merchant_aliases_are_whole_words(self):
+        for name, key in [("Sbuxton Farms", "sbuxton farms"), ("Tuber Trip Tours", "tuber trip tours"),
+                          ("AMZNX Labs", "amznx labs"), ("Whole Foodstuffs", "whole foodstuffs"),
+                          ("Netflixer", "netflixer")]:
+            self.assertEqual(matching.normalize_merchant(name), key, name)
+
+    def test_issuers(self):
+        self.assertEqual(matching.guess_issuer("Barclaycard Arrival"), "Barclays")
+        self.assertEqual(matching.guess_issuer("CITIBANK Double Cash"), "Citi")
+        self.assertEqual(matching.guess_issuer("Plaid Gold - Standard 0% Interest"), "Plaid Gold")
+
+
+class GoalsEtagTests(TestCase):
+
+    def test_rule_changes_change_rules_state(self):
+        before = versions.rules_state()
+        rule = CategoryRule.objects.create(name="gym", keywords="gym", categories="Health / Gym")
+        created = versions.rules_state()
+        self.assertNotEqual(before, created)
+
+        rule.priority = 1
+        rule.save()
+        self.assertNotEqual(created, versions.rules_state())
+
+        rule.delete()
+        self.assertEqual(before, versions.rules_state())
+
+    def test_etag_changes_with_the_day(self):
+        request = RequestFactory().get("/goals/")
+        request.user = AnonymousUser()
+        with mock.patch.object(versions, "date") as today:
+            today.today.return_value = date(2026, 1, 1)
+            first = versions.goals_etag(request)
+            self.assertEqual(first, versions.goals_etag(request))
+            today.today.return_value = date(2026, 1, 2)
+            self.assertNotEqual(first, versions.goals_etag(request))
+
+
+class CatalogVersionTests(TestCase):
+
+    def test_table_exists_before_the_perk_loader(self):
+        self.assertEqual(CatalogVersion.current(), 0)
+        CatalogVersion.bump()
+        self.assertEqual(CatalogVersion.current(), 1)
+        self.assertIsNotNone(versions.catalog_state()[1])
+
+
+class RewardsReportTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("wallet", password="x"))
+
+    def test_empty_report_before_any_sync(self):
+        response = self.client.get("/cards/rewards/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["transactions"], 0)
+        self.assertEqual(response.json()["top_missed"], [])
+
+    def test_etag_depends_on_top(self):
+        etag = self.client.get("/cards/rewards/?top=5")["ETag"]
+        self.assertEqual(self.client.get("/cards/rewards/?top=5", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get("/cards/rewards/?top=50", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_modified_since_alone_never_revalidates(self):
+        response = self.client.get("/cards/rewards/")
+        self.assertFalse(response.has_header("Last-Modified"))
+        since = "Fri, 01 Jan 2100 00:00:00 GMT"
+        self.assertEqual(self.client.get("/cards/rewards/", HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+
+class EnsureSchemaTests(SimpleTestCase):
+
+    def test_schema_setup_keeps_the_loaders_transaction(self):
+        for module in (simulator, welcome, anomalies, search, categorize):
+            conn = sqlite3.connect(":memory:")
+            cur = conn.cursor()
+            cur.execute("CREATE TABLE transactions (transaction_id TEXT, name TEXT, merchant_name TEXT)")
+            cur.execute("CREATE TABLE transaction_categories (transaction_id TEXT, idx INTEGER, category TEXT)")
+            conn.commit()
+
+            cur.execute("INSERT INTO transactions VALUES ('t1', 'coffee', 'Blue Bottle')")
+            module.ensure_schema(cur)
+            conn.rollback()
+            self.assertEqual(cur.execute("SELECT COUNT(*) FROM transactions").fetchone()[0], 0, module.__name__)
+            conn.close()
+
+
+def history(*rows):
+    """(date, amount, category path) rows -> the dict rewards.load_transactions() returns."""
+    return {
+        "dates"     : np.array([d for d, _, _ in rows], dtype="datetime64[D]"),
+        "amounts"   : np.array([a for _, a, _ in rows], dtype=np.float64),
+        "categories": [c for _, _, c in rows],
+    }
+
+
+class ForecastTests(SimpleTestCase):
+
+    goal = {"category": "Dining", "limit_amount": 300, "period_start": "2026-03-01", "period_end": "2026-03-30"}
+
+    def test_run_rate_only(self):
+        transactions = history(("2026-03-02", 50, "Food / Dining"), ("2026-03-05", 50, "Food / Dining"),
+                               ("2026-03-06", 999, "Travel"), ("2026-02-28", 999, "Food / Dining"))
+        result, = forecast.forecast([self.goal], transactions, date(2026, 3, 10))
+        # 100 over 10 of 30 days -> 10/day for 20 more days
+        self.assertEqual(result["current_spend"], 100)
+        self.assertEqual(result["projected"], 300)
+        self.assertEqual(result["projected_pct"], 100)
+        self.assertEqual(result["overrun"], 0)
+
+    def test_blends_the_same_window_a_year_back(self):
+        transactions = history(("2025-03-03", 600, "Dining"), ("2026-03-02", 100, "Dining"))
+        result, = forecast.forecast([self.goal], transactions, date(2026, 3, 10))
+        # run-rate 10/day, last year 600 / 30 = 20/day -> 15/day for 20 days
+        self.assertEqual(result["projected"], 400)
+        self.assertEqual(result["overrun"], 100)
+
+    def test_no_goals(self):
+        self.assertEqual(forecast.forecast([], history(), date(2026, 3, 10)), [])
+
+
+class GoalForecastCacheTests(TestCase):
+
+    def test_rule_edit_recomputes(self):
+        goal = dict(ForecastTests.goal)
+        before = history(("2026-03-02", 100, "Uncategorized"))
+        after = history(("2026-03-02", 100, "Food / Dining"))  # what the sync writes once the rule exists
+        with mock.patch.object(forecast.rewards, "load_transactions", return_value=before) as load:
+            first, = forecast.goal_forecasts([goal], user_id=-1, today=date(2026, 3, 10))
+            load.return_value = after
+            self.assertEqual(forecast.goal_forecasts([goal], user_id=-1, today=date(2026, 3, 10))[0], first)
+
+            CategoryRule.objects.create(name="dining", keywords="uncategorized", categories="Food / Dining")
+            second, = forecast.goal_forecasts([goal], user_id=-1, today=date(2026, 3, 10))
+        self.assertEqual(first["current_spend"], 0)
+        self.assertEqual(second["current_spend"], 100)
+
+
+def ingest_db():
+    """In-memory DB with the perk and bills loaders' schema (and the tables they maintain)."""
+    conn = sqlite3.connect(":memory:")
+    cur = conn.cursor()
+    load_perks_to_sqlite.ensure_schema(cur)
+    load_bills_to_sqlite.ensure_schema(cur)
+    cur.executemany("INSERT INTO accounts (account_id, name) VALUES (?, ?)", [("acc1", "one"), ("acc2", "two")])
+    return conn, cur
+
+
+def add_card(cur, name, account, base_rate=1.0, bonuses=(), period=None):
+    """bonuses: (category name, rate, cap) tuples; period: (start, end) of rotating categories."""
+    cur.execute("INSERT INTO cards (card_name, plaid_account_id, base_reward_rate) VALUES (?, ?, ?)",
+                (name, account, base_rate))
+    card_id = cur.lastrowid
+    cur.executemany("INSERT INTO bonus_categories (card_id, idx, category_name, reward_rate, cap) VALUES (?, ?, ?, ?, ?)",
+                    [(card_id, i, *bonus) for i, bonus in enumerate(bonuses)])
+    if period:
+        cur.execute("INSERT INTO card_current_period (card_id, start_date, end_date) VALUES (?, ?, ?)", (card_id, *period))
+    return card_id
+
+
+def add_transactions(cur, *rows):
+    """(transaction_id, account, date, amount, category path) rows."""
+    for tx_id, account, day, amount, category in rows:
+        cur.execute("INSERT INTO transactions (transaction_id, account_id, amount, date, name) VALUES (?, ?, ?, ?, ?)",
+                    (tx_id, account, amount, day, tx_id))
+        cur.executemany("INSERT INTO transaction_categories (transaction_id, idx, category) VALUES (?, ?, ?)",
+                        [(tx_id, i, c) for i, c in enumerate(category.split(" / "))])
+
+
+DINING = "Food and Drink / Restaurants"
+
+
+class SimulatorTests(SimpleTestCase):
+
+    def setUp(self):
+        self.conn, self.cur = ingest_db()
+        self.card = add_card(self.cur, "Dining card", "acc1", bonuses=[("Dining", 4, 100)])
+
+    def tearDown(self):
+        self.conn.close()
+
+    def ledger(self):
+        self.cur.execute("SELECT transaction_id, card_id, bonus_spend, base_spend, reward FROM reward_ledger ORDER BY transaction_id")
+        return self.cur.fetchall()
+
+    def usage(self):
+        return {(u["period"], u["spent"]) for u in simulator.cap_usage(self.cur)}
+
+    def test_cap_exhaustion_and_yearly_reset(self):
+        add_transactions(self.cur, ("t1", "acc1", "2025-12-01", 80, DINING), ("t2", "acc1", "2025-12-02", 50, DINING),
+                         ("t3", "acc1", "2026-01-03", 50, DINING), ("t4", "acc1", "2026-01-04", 500, "Transfer / Credit Card"))
+        self.assertEqual(simulator.advance(self.cur), 4)
+        self.assertEqual(self.ledger(), [
+            ("t1", self.card, 80, 0, 3.2),
+            ("t2", self.card, 20, 30, 1.1),  # 20 left under the cap, the rest at 1x
+            ("t3", self.card, 50, 0, 2.0),   # new calendar year, new cap
+            ("t4", None, 0, 0, 0),
+        ])
+        self.assertEqual(self.usage(), {("2025", 100), ("2026", 50)})
+        self.assertEqual(simulator.earned(self.cur), 6.3)
+
+    def test_rotating_categories_share_one_cap_inside_the_window(self):
+        rotating = add_card(self.cur, "Rotating", "acc2", bonuses=[("Restaurants", 5, 60), ("Gas", 5, 60)],
+                            period=("2026-01-01", "2026-03-31"))
+        add_transactions(self.cur, ("r1", "acc2", "2026-01-05", 40, DINING), ("r2", "acc2", "2026-02-05", 40, "Travel / Gas Stations"),
+                         ("r3", "acc2", "2026-04-01", 40, DINING))
+        simulator.advance(self.cur)
+        self.assertEqual(self.ledger(), [
+            ("r1", rotating, 40, 0, 2.0),
+            ("r2", rotating, 20, 20, 1.2),
+            ("r3", rotating, 0, 40, 0.4),
+        ])
+        self.assertEqual(self.usage(), {("2026-01-01", 60)})
+
+    def replayed(self):
+        """Ledger of a from-scratch run over the same data."""
+        self.cur.execute("DELETE FROM reward_checkpoint")
+        simulator.advance(self.cur)
+        return self.ledger()
+
+    def test_incremental_runs_match_a_full_replay(self):
+        add_transactions(self.cur, ("t1", "acc1", "2026-01-01", 70, DINING))
+        simulator.advance(self.cur)
+        add_transactions(self.cur, ("t2", "acc1", "2026-01-02", 70, DINING))
+        self.assertEqual(simulator.advance(self.cur), 1)
+        incremental = self.ledger()
+        self.assertEqual(incremental, self.replayed())
+        self.assertEqual(simulator.advance(self.cur), 0)
+
+    def test_backfilled_transaction_replays(self):
+        add_transactions(self.cur, ("t2", "acc1", "2026-01-02", 70, DINING))
+        simulator.advance(self.cur)
+        add_transactions(self.cur, ("t1", "acc1", "2026-01-01", 70, DINING))  # older statement loaded late
+        self.assertEqual(simulator.advance(self.cur), 2)
+        self.assertEqual(self.ledger(), [("t1", self.card, 70, 0, 2.8), ("t2", self.card, 30, 40, 1.6)])
+
+    def test_changed_transaction_replays(self):
+        add_transactions(self.cur, ("t1", "acc1", "2026-01-01", 70, DINING), ("t2", "acc1", "2026-01-02", 70, DINING))
+        simulator.advance(self.cur)
+        # the loader upserts unchanged rows on every sync; that alone must not replay
+        self.cur.execute("UPDATE transactions SET amount = amount, name = 'renamed'")
+        self.assertEqual(simulator.advance(self.cur), 0)
+
+        self.cur.execute("UPDATE transactions SET amount = 20 WHERE transaction_id = 't1'")
+        self.assertEqual(simulator.advance(self.cur), 2)
+        self.assertEqual(self.ledger(), [("t1", self.card, 20, 0, 0.8), ("t2", self.card, 70, 0, 2.8)])
+
+    def test_relinked_card_replays(self):
+        add_transactions(self.cur, ("t1", "acc1", "2026-01-01", 70, DINING))
+        simulator.advance(self.cur)
+        self.cur.execute("UPDATE cards SET plaid_account_id = 'acc2' WHERE id = ?", (self.card,))
+        self.assertEqual(simulator.advance(self.cur), 1)
+        self.assertEqual(self.ledger(), [("t1", None, 0, 0, 0)])
+
+
+class WelcomeBonusTests(SimpleTestCase):
+
+    def setUp(self):
+        self.conn, self.cur = ingest_db()
+        self.card = add_card(self.cur, "Bonus card", "acc1")
+        self.cur.execute("INSERT INTO welcome_bonuses (card_id, spend_requirement, time_frame_months) VALUES (?, 500, 3)",
+                         (self.card,))
+
+    def tearDown(self):
+        self.conn.close()
+
+    def progress(self):
+        self.cur.execute("SELECT window_start, window_end, spend, met_on FROM welcome_bonus_progress WHERE card_id = ?",
+                         (self.card,))
+        return self.cur.fetchone()
+
+    def test_window_and_met_on(self):
+        add_transactions(self.cur, ("t0", "acc1", "2026-01-01", 1000, "Transfer / Credit Card"),
+                         ("t1", "acc1", "2026-01-10", 200, DINING), ("t2", "acc2", "2026-01-12", 900, DINING))
+        self.assertEqual(welcome.advance(self.cur), 1)
+        # the window opens on the first eligible purchase on the card's own account
+        self.assertEqual(self.progress(), ("2026-01-10", "2026-04-10", 200, None))
+
+        add_transactions(self.cur, ("t3", "acc1", "2026-02-01", 350, DINING), ("t4", "acc1", "2026-05-01", 100, DINING))
+        self.assertEqual(welcome.advance(self.cur), 1)
+        self.assertEqual(self.progress(), ("2026-01-10", "2026-04-10", 550, "2026-02-01"))
+        self.assertEqual(welcome.advance(self.cur), 0)
+
+    def test_changed_terms_restart(self):
+        add_transactions(self.cur, ("t1", "acc1", "2026-01-10", 200, DINING), ("t2", "acc1", "2026-02-01", 350, DINING))
+        welcome.advance(self.cur)
+        self.cur.execute("UPDATE welcome_bonuses SET spend_requirement = 1000, time_frame_months = 1")
+        self.assertEqual(welcome.advance(self.cur), 1)
+        self.assertEqual(self.progress(), ("2026-01-10", "2026-02-10", 550, None))
+
+    def test_backfill_restarts(self):
+        add_transactions(self.cur, ("t2", "acc1", "2026-02-01", 350, DINING))
+        welcome.advance(self.cur)
+        add_transactions(self.cur, ("t1", "acc1", "2026-01-10", 200, DINING))
+        self.assertEqual(welcome.advance(self.cur), 1)
+        self.assertEqual(self.progress(), ("2026-01-10", "2026-04-10", 550, "2026-02-01"))
+
+
+class OptimizerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.conn, self.cur = ingest_db()
+        self.cur.execute("INSERT INTO accounts (account_id, name) VALUES ('acc3', 'unlinked')")
+        self.dining = add_card(self.cur, "Dining card", "acc1", bonuses=[("Dining", 3, None)])
+        self.grocery = add_card(self.cur, "Grocery card", "acc2", base_rate=1.5, bonuses=[("Groceries", 4, None)])
+        self.wallet = rewards.load_wallet(self.cur)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_rate_matrix(self):
+        dining, groceries = rewards.classify("dining"), rewards.classify("groceries")
+        classes = np.array([dining, groceries, dining | groceries, dining], dtype=bool)
+        eligible = np.array([True, True, True, False])
+        np.testing.assert_array_equal(rewards.rate_matrix(classes, eligible, self.wallet),
+                                      [[3, 1.5], [1, 4], [3, 4], [0, 0]])
+
+    def test_optimize(self):
+        add_transactions(self.cur, ("d1", "acc1", "2026-01-01", 100, DINING),
+                         ("g1", "acc1", "2026-01-02", 50, "Shops / Supermarkets and Groceries"),
+                         ("p1", "acc2", "2026-01-03", 500, "Transfer / Credit Card"),
+                         ("o1", "acc3", "2026-01-04", 20, "Shops"))
+        transactions = rewards.load_transactions(self.cur)
+        result = rewards.optimize(transactions, self.wallet)
+        dining, grocery = 0, 1
+        np.testing.assert_array_equal(result["best"], [dining, grocery, -1, grocery])
+        np.testing.assert_array_equal(result["used"], [dining, dining, grocery, -1])
+        np.testing.assert_allclose(result["best_reward"], [3, 2, 0, 0.3])
+        np.testing.assert_allclose(result["used_reward"], [3, 0.5, 0, 0])  # the unlinked account earns nothing as used
+        np.testing.assert_allclose(result["missed"], [0, 1.5, 0, 0.3])
+
+        summary = rewards.summarize(transactions, self.wallet, result, top=1)
+        self.assertEqual(summary["missed_rewards"], 1.8)
+        self.assertEqual([m["transaction_id"] for m in summary["top_missed"]], ["g1"])
+        self.assertEqual({c["name"]: c["transactions"] for c in summary["best_cards"]},
+                         {"Dining card": 1, "Grocery card": 2})
+
+
+class RewardsSummaryCacheTests(TestCase):
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cached_until_the_catalog_changes(self):
+        with mock.patch.object(views.rewards, "report", return_value={"transactions": 3}) as report:
+            self.assertEqual(views.rewards_summary(top=0), {"transactions": 3})
+            views.rewards_summary(top=0)
+            self.assertEqual(report.call_count, 1)
+            views.rewards_summary(top=5)
+            self.assertEqual(report.call_count, 2)
+            CatalogVersion.bump()
+            views.rewards_summary(top=0)
+            self.assertEqual(report.call_count, 3)
+
+
+class AnomalyTests(SimpleTestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.cur = self.conn.cursor()
+        anomalies.ensure_schema(self.cur)
+        self.ids = iter(range(10**6))
+
+    def tearDown(self):
+        self.conn.close()
+
+    def observe(self, merchant, amount, day, categories=("Food and Drink", "Restaurants")):
+        return [kind for kind, *_ in anomalies.observe(self.cur, f"t{next(self.ids)}", merchant, list(categories), amount, day)]
+
+    def stats(self, scope, key):
+        return anomalies._stats(self.cur, scope, key)
+
+    def test_running_stats_match_batch(self):
+        amounts = [12.5, 9.99, 30.0, 14.25, 11.0, 18.75, 9.5, 22.0]
+        for i, amount in enumerate(amounts):
+            self.observe("Blue Bottle", amount, f"2026-01-{i * 3 + 1:02d}")
+        count, mean, m2 = self.stats("merchant", "blue bottle")[:3]
+        self.assertEqual(count, len(amounts))
+        self.assertAlmostEqual(mean, np.mean(amounts))
+        self.assertAlmostEqual(math.sqrt(m2 / (count - 1)), np.std(amounts, ddof=1))
+        self.assertAlmostEqual(anomalies.zscore((count, mean, m2), 50),
+                               (50 - np.mean(amounts)) / np.std(amounts, ddof=1))
+        self.assertEqual(self.stats("category", "restaurants")[0], len(amounts))
+        self.assertIsNone(anomalies.zscore((anomalies.MIN_SAMPLES - 1, 10.0, 4.0), 1000))
+
+    def test_flags(self):
+        for i, amount in enumerate([10, 11, 9, 10, 12]):
+            self.assertEqual(self.observe("Corner Deli", amount, f"2026-01-{i * 5 + 1:02d}"), [])
+        self.assertEqual(self.observe("Corner Deli", 95, "2026-02-01"), ["amount_outlier"])
+        self.assertEqual(self.observe("Corner Deli", 95, "2026-02-02"), ["duplicate"])
+        self.assertEqual(self.observe("Corner Deli", 95, "2026-02-09"), [])
+        # payments are neither scored nor folded in
+        self.assertEqual(self.observe("Card Payment", 5000, "2026-02-10", ("Payment", "Credit Card")), [])
+        self.assertEqual(self.stats("merchant", "card payment")[0], 0)
+
+    def test_new_merchant_after_warmup_and_ids_scored_once(self):
+        self.assertEqual(self.observe("First Cafe", 10, "2026-01-01"), [])
+        for i in range(anomalies.WARMUP):
+            self.observe("Corner Deli", 10, f"2026-01-{i + 2:02d}")
+        self.assertEqual(self.observe("Second Cafe", 10, "2026-02-01"), ["new_merchant"])
+
+        before = self.stats("all", "")
+        self.assertEqual(anomalies.observe(self.cur, "t0", "Other", [], 10, "2026-02-02"), [])
+        self.assertEqual(self.stats("all", ""), before)
+
+
+class SearchTests(SimpleTestCase):
+
+    def setUp(self):
+        self.conn, self.cur = ingest_db()
+        add_transactions(self.cur, ("t1", "acc1", "2026-01-01", 5, DINING), ("t2", "acc1", "2026-01-02", 60, "Shops / Supermarkets"))
+
+    def tearDown(self):
+        self.conn.close()
+
+    def search(self, text):
+        self.cur.execute(search.SEARCH_SQL.replace("%s", "?"), [search.match_query(text), 20])
+        return sorted(row[0] for row in self.cur.fetchall())
+
+    def test_index_follows_the_tables(self):
+        self.assertEqual(self.search("restaur"), ["t1"])
+        self.assertEqual(self.search("supermarkets"), ["t2"])
+
+        add_transactions(self.cur, ("t3", "acc1", "2026-01-03", 7, "Food and Drink / Coffee Shop"))
+        self.assertEqual(self.search("coffee"), ["t3"])
+        self.assertEqual(self.search("food"), ["t1", "t3"])
+
+        self.cur.execute("UPDATE transactions SET merchant_name = 'Blue Bottle' WHERE transaction_id = 't3'")
+        self.assertEqual(self.search("blue bottle"), ["t3"])
+        self.cur.execute("DELETE FROM transaction_categories WHERE transaction_id = 't3'")
+        self.assertEqual(self.search("coffee"), [])
+
+        self.cur.execute("DELETE FROM transactions WHERE transaction_id = 't1'")
+        self.assertEqual(self.search("restaur"), [])
+        self.assertEqual(self.search("food"), [])
+
+    def test_backfills_existing_rows(self):
+        self.cur.execute(f"DROP TABLE {search.FTS_TABLE}")
+        self.assertTrue(search.ensure_schema(self.cur))
+        self.assertEqual(self.search("supermarkets"), ["t2"])
+
+    def test_query_syntax_is_quoted(self):
+        self.assertEqual(search.match_query('coffee OR "tea" NEAR('), '"coffee"* "OR"* "tea"* "NEAR"*')
+        self.assertEqual(self.search("food OR shops"), [])
+
+
+class SubscriptionTests(TestCase):
+    """detect() over the raw tables the bills loader writes, created inside the test's transaction."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user("owner", id=versions.GOALS_USER_ID)
+        with connection.cursor() as cur:
+            cur.execute("CREATE TABLE accounts (account_id TEXT PRIMARY KEY)")
+            cur.execute("""CREATE TABLE transactions (transaction_id TEXT PRIMARY KEY, account_id TEXT, amount REAL,
+                           date TEXT, name TEXT, merchant_name TEXT)""")
+            cur.execute("CREATE TABLE transaction_categories (transaction_id TEXT, idx INTEGER, category TEXT)")
+            cur.execute("INSERT INTO accounts VALUES ('acc1')")
+
+    def charge(self, *rows):
+        """(merchant, amount, date) rows on the owner's account."""
+        with connection.cursor() as cur:
+            for merchant, amount, day in rows:
+                cur.execute("INSERT INTO transactions VALUES (%s, 'acc1', %s, %s, %s, %s)",
+                            [f"{merchant}-{day}", amount, day, merchant, merchant])
+
+    def subscriptions(self):
+        return {(s.merchant, float(s.amount), s.billing_cycle, s.next_payment_date.isoformat())
+                for s in Subscription.objects.filter(user=self.owner)}
+
+    def test_cycles(self):
+        self.charge(("NETFLIX.COM", 15.49, "2026-01-05"), ("NETFLIX.COM", 15.49, "2026-02-05"),
+                    ("NETFLIX.COM", 15.49, "2026-03-05"),
+                    ("Gym Co, Inc.", 10, "2026-03-01"), ("Gym Co, Inc.", 10, "2026-03-08"), ("Gym Co, Inc.", 10, "2026-03-15"),
+                    ("Domain Renewal", 12, "2025-03-10"), ("Domain Renewal", 12, "2026-03-10"),
+                    ("Corner Deli", 9, "2026-01-02"), ("Corner Deli", 9, "2026-01-20"), ("Corner Deli", 9, "2026-03-01"),
+                    ("SPOTIFY", 9.99, "2026-02-10"), ("SPOTIFY", 9.99, "2026-03-10"))  # two charges: not yet
+        subscriptions.detect(self.owner.pk, today=date(2026, 3, 16))
+        self.assertEqual(self.subscriptions(), {
+            ("NETFLIX.COM", 15.49, "monthly", "2026-04-05"),
+            ("Gym Co, Inc.", 10, "weekly", "2026-03-22"),
+            ("Domain Renewal", 12, "yearly", "2027-03-10"),
+        })
+
+    def test_price_change_starts_a_new_series(self):
+        self.charge(("NETFLIX.COM", 15.49, "2026-01-05"), ("NETFLIX.COM", 15.49, "2026-02-05"),
+                    ("NETFLIX.COM", 22.99, "2026-03-05"))
+        subscriptions.detect(self.owner.pk, today=date(2026, 3, 16))
+        self.assertEqual(self.subscriptions(), set())
+
+    def test_lapse(self):
+        self.charge(("NETFLIX.COM", 15.49, "2026-01-05"), ("NETFLIX.COM", 15.49, "2026-02-05"),
+                    ("NETFLIX.COM", 15.49, "2026-03-05"))
+        subscriptions.detect(self.owner.pk, today=date(2026, 5, 6))  # 04-05 and 05-05 both missed
+        self.assertEqual(self.subscriptions(), set())
+        subscriptions.detect(self.owner.pk, today=date(2026, 5, 5))
+        self.assertEqual(len(self.subscriptions()), 1)
+
+    def test_incremental_matches_full(self):
+        months = [f"2026-{m:02d}-05" for m in range(1, 7)]
+        self.charge(*[("NETFLIX.COM", 15.49, d) for d in months[:2]], ("Gym Co", 10, "2026-02-01"))
+        self.assertEqual(subscriptions.detect(self.owner.pk, today=date(2026, 2, 10)), 3)
+        self.charge(*[("NETFLIX.COM", 15.49, d) for d in months[2:]],
+                    *[("Gym Co", 10, f"2026-02-{d:02d}") for d in (8, 15, 22)])
+        self.assertEqual(subscriptions.detect(self.owner.pk, today=date(2026, 6, 10)), 7)
+        self.assertEqual(subscriptions.detect(self.owner.pk, today=date(2026, 6, 10)), 0)
+        incremental = self.subscriptions(), sorted(RecurringSeries.objects.values_list(
+            "merchant_key", "amount", "occurrences", "weekly_hits", "monthly_hits", "yearly_hits", "last_date"))
+
+        RecurringCheckpoint.objects.all().delete()
+        RecurringSeries.objects.all().delete()
+        Subscription.objects.all().delete()
+        self.assertEqual(subscriptions.detect(self.owner.pk, today=date(2026, 6, 10)), 10)
+        full = self.subscriptions(), sorted(RecurringSeries.objects.values_list(
+            "merchant_key", "amount", "occurrences", "weekly_hits", "monthly_hits", "yearly_hits", "last_date"))
+        self.assertEqual(incremental, full)
+        self.assertEqual(incremental[0], {("NETFLIX.COM", 15.49, "monthly", "2026-07-05")})  # the gym lapsed
+
+        self.charge(("Corner Deli", 9, "2026-01-01"))  # behind the checkpoint: rebuilt from scratch
+        self.assertEqual(subscriptions.detect(self.owner.pk, today=date(2026, 6, 10)), 11)
+
+    def test_only_the_users_accounts(self):
+        self.charge(*[("NETFLIX.COM", 15.49, f"2026-0{m}-05") for m in (1, 2, 3)])
+        other = User.objects.create_user("other")
+        self.assertEqual(subscriptions.detect(other.pk, today=date(2026, 3, 16)), 0)
+        self.assertFalse(Subscription.objects.filter(user=other).exists())
+
+    def test_page_does_not_detect(self):
+        self.charge(*[("NETFLIX.COM", 15.49, f"2026-0{m}-05") for m in (1, 2, 3)])
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get("/subscriptions/").status_code, 200)
+        self.assertFalse(RecurringCheckpoint.objects.exists())
@@ -8,6 +8,9 @@ urlpatterns = [
     path("cards/", views.cards_dashboard, name="cards_dashboard"),
     path("deals/", views.perks_dashboard, name="deals"),
     path("goals/", views.spending_dashboard, name="goals"),
+    path("subscriptions/", views.subscriptions_dashboard, name="subscriptions"),
+    path("transactions/search/", views.search_transactions, name="search_transactions"),
     path('cards/delete/<int:card_id>/', views.delete_card, name='delete_card'),
     path("cards/add/", views.add_card, name="add_card"),
+    path("cards/rewards/", views.rewards_report, name="rewards_report"),
 ]
@@ -0,0 +1,103 @@
+# wallet/versions.py
+"""
+Cheap data versions for the wallet pages.
+
+Each *_etag function has the signature expected by
+django.views.decorators.http.condition, so a page can answer 304 without
+running its queries or rendering its template. There is deliberately no
+Last-Modified: the pages depend on inputs without a timestamp (ingest
+meta, goals, rules, the viewer), and If-Modified-Since alone would then
+revalidate stale pages.
+"""
+import hashlib
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.middleware.csrf import get_token
+
+from .models import CatalogVersion, IngestMeta, Goal, CategoryRule
+
+# Files the goals page syncs from on every full render (see views.spending_dashboard)
+SYNC_SOURCES = ("plaid_latest.json", "bills.json", "load_bills_to_sqlite.py")
+
+# wallet_goal rows shown on the goals page; the page is not per-user yet
+GOALS_USER_ID = 1
+
+
+def _digest(*parts):
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+def catalog_state():
+    """(version, updated_at) of the card catalog, (0, None) before the perk loader ran."""
+    try:
+        row = CatalogVersion.objects.values_list("version", "updated_at").first()
+    except DatabaseError:
+        row = None
+    return row or (0, None)
+
+
+def meta_state():
+    try:
+        return tuple(IngestMeta.objects.values_list("request_id", "total_transactions"))
+    except DatabaseError:
+        return ()
+
+
+def sources_state():
+    base = Path(settings.BASE_DIR)
+    state = []
+    for name in SYNC_SOURCES:
+        try:
+            st = (base / name).stat()
+        except OSError:
+            continue
+        state.append((name, st.st_mtime_ns, st.st_size))
+    return tuple(state)
+
+
+def goals_state(user_id=GOALS_USER_ID):
+    return tuple(
+        Goal.objects.filter(user_id=user_id)
+        .order_by("id")
+        .values_list("id", "category", "limit_amount", "period_start", "period_end")
+    )
+
+
+def rules_state():
+    # The full render's sync backfills categories with these rules
+    try:
+        return tuple(CategoryRule.objects.order_by("id").values_list(
+            "id", "merchant_pattern", "keywords", "min_amount", "max_amount", "categories", "priority", "is_active"))
+    except DatabaseError:
+        return ()
+
+
+def _viewer(request):
+    # Pages carry the user's name and a CSRF token, so a cached copy is only valid for the same
+    # CSRF secret. get_token() creates the secret on a first visit, so that response's ETag already matches.
+    get_token(request)
+    return request.user.pk, request.META.get("CSRF_COOKIE")
+
+
+def cards_etag(request, *args, **kwargs):
+    # Missed rewards and welcome-bonus progress follow the synced transactions
+    return _digest("cards", _viewer(request), catalog_state()[0], meta_state(), sources_state())
+
+
+def rewards_etag(request, *args, **kwargs):
+    # Same data as the cards page, but the body also depends on ?top=
+    return _digest("rewards", cards_etag(request), sorted(request.GET.lists()))
+
+
+def deals_etag(request, *args, **kwargs):
+    return _digest("deals", _viewer(request), catalog_state()[0])
+
+
+def goals_etag(request, *args, **kwargs):
+    # The forecasts project from today, so the page changes at midnight even with no new data
+    return _digest("goals", _viewer(request), date.today(), sources_state(), meta_state(), goals_state(),
+                   rules_state())
+
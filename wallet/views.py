@@ -1,21 +1,25 @@
 from django.shortcuts import render
+from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.views.decorators.http import require_POST
-from django.db import connection
+from django.views.decorators.http import require_POST, condition
+from django.views.decorators.cache import cache_control
+from django.core.cache import cache
+from django.db import connection, DatabaseError
 
-from .models import Transaction, Card, Deal, Goal, Subscription
+from .models import Transaction, Card, Deal, Goal, Subscription, CatalogCard, CatalogVersion, PlaidTransaction, WelcomeBonusProgress
 import markdown2
 from pathlib import Path
 from django.conf import settings
 from .plaid_pull import sync_plaid_to_sqlite
+from . import versions, rewards, simulator, subscriptions, forecast, search
 from importlib.machinery import SourceFileLoader
 import sqlite3, os
 
 def sync_plaid_to_sqlite(json_plaid_path, db_path, loader_path, bills_json_path=None, wipe_transactions=True):
     """
-    Drops transactions + transaction_categories, then re-creates them by running your loader
-    on plaid_latest.json and (optionally) bills.json. Returns simple table counts.
+    Drops transactions + transaction_categories (and their search index), then re-creates them by
+    running your loader on plaid_latest.json and (optionally) bills.json. Returns simple table counts.
     """
     db_path = str(db_path)
     # 1) Drop the two tables (safe even if they don't exist yet)
@@ -26,6 +30,7 @@ def sync_plaid_to_sqlite(json_plaid_path, db_path, loader_path, bills_json_path=
             PRAGMA foreign_keys=OFF;
             DROP TABLE IF EXISTS transaction_categories;
             DROP TABLE IF EXISTS transactions;
+            DROP TABLE IF EXISTS transactions_fts;
             PRAGMA foreign_keys=ON;
         """)
     conn.commit()
@@ -69,99 +74,30 @@ def cards_view(request):
     return render(request, "wallet/cards.html", {"cards": cards})
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versions.deals_etag)
 def perks_dashboard(request):
-    with connection.cursor() as cur:
-        cur.executescript("PRAGMA foreign_keys = ON;")
-
-    cards = {}
-    with connection.cursor() as cur:
-        cur.execute("""
-          SELECT id, card_name, issuer, COALESCE(annual_fee, 0), type, COALESCE(base_reward_rate, 0)
-          FROM cards
-          ORDER BY issuer, card_name
-        """)
-        for cid, name, issuer, fee, ctype, base_rate in cur.fetchall():
-            cards[cid] = {
-                "id": cid,
-                "card_name": name or "",
-                "issuer": issuer or "",
-                "annual_fee": float(fee or 0),
-                "type": ctype or "",
-                "base_reward_rate": float(base_rate or 0),
-                "bonus_categories": [],
-                "perks": [],
-                "welcome_bonus": None,
-                "current_period": None,
-            }
-
+    version = CatalogVersion.current()
+    cards = CatalogCard.objects.cached_details(version)
     if not cards:
         return render(request, "wallet/deals.html", {"cards": [], "issuers": []})
 
-    valid_ids = set(cards.keys())
-
-    with connection.cursor() as cur:
-        cur.execute("""
-          SELECT card_id, idx, category_name, reward_rate, cap, note
-          FROM bonus_categories
-          ORDER BY card_id, idx
-        """)
-        for card_id, idx, cat_name, rate, cap, note in cur.fetchall():
-            if card_id in valid_ids:
-                cards[card_id]["bonus_categories"].append({
-                    "category_name": cat_name or "",
-                    "reward_rate": float(rate or 0),
-                    "cap": None if cap is None else float(cap),
-                    "note": note or "",
-                })
-
-    with connection.cursor() as cur:
-        cur.execute("""
-          SELECT card_id, idx, perk_name, description, frequency
-          FROM perks
-          ORDER BY card_id, idx
-        """)
-        for card_id, idx, perk_name, desc, freq in cur.fetchall():
-            if card_id in valid_ids:
-                cards[card_id]["perks"].append({
-                    "perk_name": perk_name or "",
-                    "description": desc or "",
-                    "frequency": freq or "",
-                })
-
-    with connection.cursor() as cur:
-        cur.execute("""
-          SELECT card_id, points, cash_back, points_or_cash, spend_requirement, time_frame_months
-          FROM welcome_bonuses
-        """)
-        for card_id, points, cash_back, poc, spend_req, tf_months in cur.fetchall():
-            if card_id in valid_ids:
-                cards[card_id]["welcome_bonus"] = {
-                    "points": None if points is None else int(points),
-                    "cash_back": None if cash_back is None else float(cash_back),
-                    "points_or_cash": None if poc is None else float(poc),
-                    "spend_requirement": None if spend_req is None else float(spend_req),
-                    "time_frame_months": None if tf_months is None else int(tf_months),
-                }
-
-    with connection.cursor() as cur:
-        cur.execute("""
-          SELECT card_id, start_date, end_date
-          FROM card_current_period
-        """)
-        for card_id, start_date, end_date in cur.fetchall():
-            if card_id in valid_ids:
-                cards[card_id]["current_period"] = {
-                    "start_date": start_date,
-                    "end_date": end_date,
-                }
-
-    issuers = sorted({(c["issuer"] or "").strip() for c in cards.values() if c["issuer"]})
+    issuers = sorted({(c.issuer or "").strip() for c in cards if c.issuer})
     return render(request, "wallet/deals.html", {
-        "cards": list(cards.values()),
+        "cards": cards,
         "issuers": issuers,
+        "catalog_version": version,
+        "fragment_timeout": settings.CATALOG_FRAGMENT_TIMEOUT,
     })
     
 
+@login_required
+def subscriptions_dashboard(request):
+    # Series are advanced on the sync path (spending_dashboard), not on this GET
+    subs = Subscription.objects.filter(user=request.user).order_by("next_payment_date")
+    return render(request, "wallet/subscriptions.html", {"subscriptions": subs})
+
+
 @login_required
 def add_card(request):
     if request.method == "POST":
@@ -177,6 +113,7 @@ def add_card(request):
                     INSERT INTO cards (card_name, issuer, annual_fee, type, base_reward_rate)
                     VALUES (%s, %s, %s, %s, %s)
                 """, [card_name, issuer, annual_fee, card_type, base_reward_rate])
+            CatalogVersion.bump()
 
             messages.success(request, f"✅ {card_name} added successfully!")
             return redirect("cards_dashboard")
@@ -194,99 +131,104 @@ def delete_card(request, card_id):
     if request.method == "POST":
         with connection.cursor() as cur:
             cur.execute("DELETE FROM cards WHERE id = %s", [card_id])
+        CatalogVersion.bump()
         return redirect('/cards/')
     
+# rewards.report() reads the whole history; the key changes with the catalog and every ingest
+REWARDS_CACHE_PREFIX = "wallet:rewards_report"
+REWARDS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def rewards_summary(top):
+    """rewards.report() cached under the catalog version and ingest state, the cards page's ETag inputs."""
+    key = "%s:%s" % (REWARDS_CACHE_PREFIX, versions._digest(
+        top, versions.catalog_state()[0], versions.meta_state(), versions.sources_state(),
+    ))
+    report = cache.get(key)
+    if report is None:
+        try:
+            with connection.cursor() as cur:
+                report = rewards.report(cur, top=top)
+        except DatabaseError:
+            # transactions are loaded by the bills loader; nothing synced yet
+            return rewards.empty_report()
+        cache.set(key, report, REWARDS_CACHE_TIMEOUT)
+    return report
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versions.cards_etag)
 def cards_dashboard(request):
-    with connection.cursor() as cur:
-        cur.executescript("PRAGMA foreign_keys = ON;")
+    version = CatalogVersion.current()
+    cards = CatalogCard.objects.cached_details(version)
 
-    cards = {}
-    with connection.cursor() as cur:
-        cur.execute("""
-          SELECT id, card_name, issuer, COALESCE(annual_fee, 0), type, COALESCE(base_reward_rate, 0)
-          FROM cards
-          ORDER BY issuer, card_name
-        """)
-        for cid, name, issuer, fee, ctype, base_rate in cur.fetchall():
-            cards[cid] = {
-                "id": cid,
-                "card_name": name or "",
-                "issuer": issuer or "",
-                "annual_fee": float(fee or 0),
-                "type": ctype or "",
-                "base_reward_rate": float(base_rate or 0),
-                "bonus_categories": [],
-                "perks": [],
-                "welcome_bonus": None,
-                "current_period": None,
-            }
-
-    valid_ids = set(cards.keys())
+    # Calculate total annual fee
+    total_fee = sum(c.annual_fee or 0 for c in cards)
 
-    with connection.cursor() as cur:
-        cur.execute("""
-          SELECT card_id, idx, category_name, reward_rate, cap, note
-          FROM bonus_categories
-          ORDER BY card_id, idx
-        """)
-        for card_id, idx, cat_name, rate, cap, note in cur.fetchall():
-            if card_id in valid_ids:
-                cards[card_id]["bonus_categories"].append({
-                    "category_name": cat_name or "",
-                    "reward_rate": float(rate or 0),
-                    "cap": None if cap is None else float(cap),
-                    "note": note or "",
-                })
+    report = rewards_summary(top=0)
 
-    with connection.cursor() as cur:
-        cur.execute("""
-          SELECT card_id, idx, perk_name, description, frequency
-          FROM perks
-          ORDER BY card_id, idx
-        """)
-        for card_id, idx, perk_name, desc, freq in cur.fetchall():
-            if card_id in valid_ids:
-                cards[card_id]["perks"].append({
-                    "perk_name": perk_name or "",
-                    "description": desc or "",
-                    "frequency": freq or "",
-                })
+    # Welcome-bonus progress is precomputed at ingest: one row per card
+    try:
+        progress = WelcomeBonusProgress.objects.in_bulk()
+    except DatabaseError:
+        progress = {}
+    for c in cards:
+        c.progress = progress.get(c.id)
 
-    with connection.cursor() as cur:
-        cur.execute("""
-          SELECT card_id, points, cash_back, points_or_cash, spend_requirement, time_frame_months
-          FROM welcome_bonuses
-        """)
-        for card_id, points, cash_back, poc, spend_req, tf_months in cur.fetchall():
-            if card_id in valid_ids:
-                cards[card_id]["welcome_bonus"] = {
-                    "points": None if points is None else int(points),
-                    "cash_back": None if cash_back is None else float(cash_back),
-                    "points_or_cash": None if poc is None else float(poc),
-                    "spend_requirement": None if spend_req is None else float(spend_req),
-                    "time_frame_months": None if tf_months is None else int(tf_months),
-                }
+    return render(request, "wallet/cards.html", {
+        "cards": cards,
+        "cards_by_fee": sorted(cards, key=lambda c: c.annual_fee or 0),
+        "total_fee": total_fee,
+        "rewards": report,
+        "catalog_version": version,
+        "fragment_timeout": settings.CATALOG_FRAGMENT_TIMEOUT,
+    })
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versions.rewards_etag)
+def rewards_report(request):
+    """Best card per transaction, rewards missed by the card actually used, and cap usage."""
+    try:
+        top = max(0, min(int(request.GET.get("top", 25)), 500))
+    except ValueError:
+        top = 25
 
+    report = rewards_summary(top)
     with connection.cursor() as cur:
-        cur.execute("""
-          SELECT card_id, start_date, end_date
-          FROM card_current_period
-        """)
-        for card_id, start_date, end_date in cur.fetchall():
-            if card_id in valid_ids:
-                cards[card_id]["current_period"] = {
-                    "start_date": start_date,
-                    "end_date": end_date,
-                }
+        try:
+            report["earned_rewards"] = simulator.earned(cur)
+            report["cap_usage"] = simulator.cap_usage(cur)
+        except DatabaseError:
+            # ledger is built by the bills loader; nothing synced yet
+            report["earned_rewards"], report["cap_usage"] = None, []
 
-    # Calculate total annual fee
-    total_fee = sum(card["annual_fee"] for card in cards.values())
+    return JsonResponse(report)
 
-    return render(request, "wallet/cards.html", {
-        "cards": list(cards.values()),
-        "total_fee": total_fee
-    })
+
+@login_required
+def search_transactions(request):
+    """Ranked full-text search over merchant, description and categories: ?q=...&limit=..."""
+    query = search.match_query(request.GET.get("q"))
+    try:
+        limit = max(1, min(int(request.GET.get("limit", 25)), 200))
+    except ValueError:
+        limit = 25
+    if not query:
+        return JsonResponse({"query": "", "results": []})
+
+    try:
+        with connection.cursor() as cur:
+            cur.execute(search.SEARCH_SQL, [query, limit])
+            cols = [c[0] for c in cur.description]
+            results = [dict(zip(cols, r)) for r in cur.fetchall()]
+    except DatabaseError as e:
+        # index not built yet (no sync so far) or SQLite without FTS5
+        return JsonResponse({"query": query, "results": [], "error": str(e)}, status=503)
+
+    return JsonResponse({"query": query, "results": results})
 
 
 from django.shortcuts import render, redirect
@@ -355,6 +297,8 @@ def get_summary():
     return summary_text
 
 @csrf_exempt
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versions.goals_etag)
 def spending_dashboard(request):
      # --- auto-sync Plaid Sandbox into SQLite on each page load ---
     try:
@@ -380,6 +324,12 @@ def spending_dashboard(request):
     except Exception as e:
         print("Plaid sandbox sync skipped:", e)
 
+    # --- recurring charges: only the transactions new since the last run ---
+    try:
+        subscriptions.detect(versions.GOALS_USER_ID)
+    except Exception as e:
+        print("Subscription detection skipped:", e)
+
 
     analysis = None
 
@@ -415,26 +365,12 @@ def spending_dashboard(request):
             analysis = markdown2.markdown(resp.text)
 
     # --- Transactions ---
-    with connection.cursor() as cur:
-        cur.execute("""
-            SELECT
-                t.transaction_id,
-                COALESCE(t.merchant_name, t.name, 'Unknown') AS merchant,
-                COALESCE(
-                    (SELECT GROUP_CONCAT(c.category, ' / ')
-                     FROM transaction_categories c
-                     WHERE c.transaction_id = t.transaction_id),
-                    ''
-                ) AS category,
-                t.date AS date,
-                t.amount AS amount
-            FROM transactions t
-            ORDER BY date DESC
-            LIMIT 100;
-        """)
-        cols = [c[0] for c in cur.description]
-        rows = cur.fetchall()
-        transactions = [dict(zip(cols, r)) for r in rows]
+    transactions = list(
+        PlaidTransaction.objects
+        .only("transaction_id", "name", "merchant_name", "date", "amount")
+        .prefetch_related("categories", "anomalies")
+        .order_by("-date")[:100]
+    )
 
     # --- Goals ---
     with connection.cursor() as cur:
@@ -447,19 +383,10 @@ def spending_dashboard(request):
         cols = [c[0] for c in cur.description]
         raw_goals = [dict(zip(cols, r)) for r in cur.fetchall()]
 
+    # Spend so far and end-of-period projection for every goal at once, cached until the next ingest
     goals = []
-    for g in raw_goals:
-        with connection.cursor() as cur:
-            cur.execute("""
-                SELECT COALESCE(SUM(amount), 0)
-                FROM transactions t
-                JOIN transaction_categories c
-                  ON c.transaction_id = t.transaction_id
-                WHERE c.category LIKE %s
-                  AND t.date BETWEEN %s AND %s;
-            """, [f"%{g['category']}%", g["period_start"], g["period_end"]])
-            current_spend = float(cur.fetchone()[0] or 0)
-
+    for g, f in zip(raw_goals, forecast.goal_forecasts(raw_goals)):
+        current_spend = f["current_spend"]
         pct = (current_spend / float(g["limit_amount"])) * 100 if g["limit_amount"] else 0
         if pct >= 75:
             color = "#ef4444"
@@ -470,7 +397,7 @@ def spending_dashboard(request):
 
         goals.append({
             **g,
-            "current_spend": current_spend,
+            **f,
             "pct": pct,
             "color": color,
         })
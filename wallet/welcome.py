@@ -0,0 +1,142 @@
+"""
+Welcome-bonus progress tracker.
+
+Keeps one row per linked card with a welcome bonus: the bonus window, the
+eligible spend inside it so far and the date the requirement was met. Each
+run only reads that card's transactions after its checkpoint. Changed bonus
+terms, or a transaction arriving behind the checkpoint, restart the card.
+
+The window opens on the first eligible purchase seen on the card's account,
+since the loaders do not know when an account was opened.
+"""
+import calendar
+from datetime import date
+
+import numpy as np
+
+from . import rewards
+
+
+def ensure_schema(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS welcome_bonus_progress (
+      card_id             INTEGER PRIMARY KEY,
+      spend_requirement   REAL,
+      time_frame_months   INTEGER,
+      window_start        TEXT,
+      window_end          TEXT,
+      spend               REAL    NOT NULL DEFAULT 0,
+      met_on              TEXT,
+      seen                INTEGER NOT NULL DEFAULT 0,   -- transactions on the account up to the checkpoint
+      last_date           TEXT,
+      last_transaction_id TEXT
+    )
+    """)
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _has_tables(cur):
+    cur.execute("""
+        SELECT COUNT(*) FROM sqlite_master
+        WHERE type='table' AND name IN ('cards', 'welcome_bonuses', 'transactions', 'transaction_categories')
+    """)
+    return cur.fetchone()[0] == 4
+
+
+def _seen_through(cur):
+    """card id -> transactions on its account up to its checkpoint, for every tracked card in one query."""
+    cur.execute("""
+        SELECT p.card_id, COUNT(t.transaction_id)
+        FROM welcome_bonus_progress p
+        JOIN cards c ON c.id = p.card_id
+        LEFT JOIN transactions t
+          ON t.account_id = c.plaid_account_id
+         AND (t.date, t.transaction_id) <= (p.last_date, p.last_transaction_id)
+        WHERE p.last_date IS NOT NULL
+        GROUP BY p.card_id
+    """)
+    return dict(cur.fetchall())
+
+
+def advance(cur):
+    """
+    Fold new transactions into every card's progress row. Returns the number
+    of cards updated. The caller commits.
+    """
+    if not _has_tables(cur):
+        return 0
+    ensure_schema(cur)
+
+    cur.execute("""
+        SELECT c.id, c.plaid_account_id, w.spend_requirement, w.time_frame_months,
+               p.card_id, p.spend_requirement, p.time_frame_months, p.window_start, p.window_end,
+               p.spend, p.met_on, p.seen, p.last_date, p.last_transaction_id
+        FROM cards c
+        JOIN welcome_bonuses w ON w.card_id = c.id
+        LEFT JOIN welcome_bonus_progress p ON p.card_id = c.id
+        WHERE c.plaid_account_id IS NOT NULL AND w.spend_requirement IS NOT NULL
+    """)
+    cards = cur.fetchall()
+
+    cur.execute("DELETE FROM welcome_bonus_progress WHERE card_id NOT IN (%s)"
+                % ",".join("?" * len(cards)), [c[0] for c in cards])
+
+    counts = _seen_through(cur)
+    updated = 0
+    for (card_id, account_id, requirement, months,
+         tracked, old_requirement, old_months, window_start, window_end,
+         spend, met_on, seen, last_date, last_id) in cards:
+
+        if (tracked is None or (old_requirement, old_months) != (requirement, months)
+                or (last_date is not None and counts.get(card_id) != seen)):
+            window_start = window_end = met_on = last_date = last_id = None
+            spend, seen = 0.0, 0
+
+        if last_date is None:
+            batch = rewards.load_transactions(cur, "WHERE t.account_id = ?", (account_id,))
+        else:
+            batch = rewards.load_transactions(
+                cur, "WHERE t.account_id = ? AND (t.date, t.transaction_id) > (?, ?)",
+                (account_id, last_date, last_id),
+            )
+        if not batch["ids"] and tracked is not None and last_date is not None:
+            continue
+
+        if batch["ids"]:
+            _, eligible, inverse = rewards.classify_rows(batch)
+            amounts = np.where(eligible[inverse], np.clip(batch["amounts"], 0, None), 0.0)
+            dates = batch["dates"]
+
+            if window_start is None and (amounts > 0).any():
+                first = dates[np.argmax(amounts > 0)].item()
+                window_start = first.isoformat()
+                window_end = add_months(first, months).isoformat() if months else None
+
+            if window_start is not None:
+                inside = dates >= np.datetime64(window_start)
+                if window_end is not None:
+                    inside &= dates <= np.datetime64(window_end)
+                amounts = np.where(inside, amounts, 0.0)
+
+                running = spend + np.cumsum(amounts)
+                if met_on is None and running.size and running[-1] >= requirement:
+                    met_on = str(dates[np.argmax(running >= requirement)])
+                spend = float(running[-1])
+
+            seen += len(batch["ids"])
+            last_date, last_id = str(dates[-1]), batch["ids"][-1]
+
+        cur.execute("""
+            INSERT OR REPLACE INTO welcome_bonus_progress
+              (card_id, spend_requirement, time_frame_months, window_start, window_end,
+               spend, met_on, seen, last_date, last_transaction_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (card_id, requirement, months, window_start, window_end,
+              round(spend, 2), met_on, seen, last_date, last_id))
+        updated += 1
+    return updated